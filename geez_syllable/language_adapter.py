@@ -3,6 +3,7 @@ Adapter to make Syllable Breaker work with SPLINTER's LanguageUtilsInterface.
 This allows us to use existing SPLINTER code without modifying it.
 """
 
+import re
 import sys
 import os
 
@@ -35,6 +36,9 @@ class GeEzLanguageAdapter(LanguageUtilsInterface):
     Implements all required methods of LanguageUtilsInterface.
     """
     
+    # Any character that is not Ge'ez, a vowel marker or ' \t\n\r'
+    FOREIGN_LETTERS_PATTERN = re.compile(r'[^\u1200-\u137F\uE000-\uE007 \t\n\r]')
+    
     def __init__(self):
         """Initialize adapter with syllable breaker."""
         self.breaker = GeEzSyllableBreaker()
@@ -55,12 +59,7 @@ class GeEzLanguageAdapter(LanguageUtilsInterface):
         Check if word contains non-Geez characters.
         Only checks the base part (ignores vowel markers).
         """
-        for char in word:
-            if (char not in self.breaker.marker_to_vowel and 
-                not self.breaker.is_geez_character(char) and
-                char not in ' \t\n\r'):
-                return True
-        return False
+        return self.FOREIGN_LETTERS_PATTERN.search(word) is not None
     
     def get_language_alphabet(self):
         """Return Ge'ez alphabet for SPLINTER."""
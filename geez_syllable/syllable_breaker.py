@@ -4,8 +4,41 @@ Converts Ge'ez syllables to Virtual Abjad for SPLINTER processing.
 """
 
 import os
+import re
 import sys
+import time
 import unicodedata
+import multiprocessing
+from itertools import islice
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.language_utils.EthiopicSyllableCodec import EthiopicSyllableCodec, LAYOUT_WORD_END
+from src.utils.utils import imap_bounded
+
+# Characters read at once by break_text_file
+DEFAULT_CHUNK_CHARS = 16 * 1024 ** 2
+# The last word of a reversed chunk, the same whitespace as str.isspace() and the codec's words
+LAST_WORD_PATTERN = re.compile(r'\S*')
+# Lines processed at once by preprocess_text_file, and seconds between its progress reports
+DEFAULT_CHUNK_LINES = 100000
+PROGRESS_INTERVAL_SECONDS = 10
+# Chunks submitted to the pool and not written yet, per worker
+PENDING_CHUNKS_PER_WORKER = 2
+
+# The breaker of a pool worker
+_preprocessing_worker_breaker = None
+
+
+def _init_preprocessing_worker():
+    global _preprocessing_worker_breaker
+    _preprocessing_worker_breaker = GeEzSyllableBreaker()
+
+
+def _preprocess_lines_chunk(lines):
+    return _preprocessing_worker_breaker.preprocess_lines(lines)
+
 
 class GeEzSyllableBreaker:
     """
@@ -47,6 +80,9 @@ class GeEzSyllableBreaker:
         
         # Reverse mapping for restoration
         self.marker_to_vowel = {v: k for k, v in self.VOWEL_MARKERS.items()}
+        
+        # Precompiled decomposition and composition tables of the whole block
+        self.codec = EthiopicSyllableCodec(self.VOWEL_MARKERS)
     
     def is_geez_character(self, char: str) -> bool:
         """Check if character is in Ethiopic range."""
@@ -84,20 +120,11 @@ class GeEzSyllableBreaker:
         Example:
             "ባሱማ" → "በሰመ" + "⠁⠥⠁" (vowel markers)
         """
-        result = []
-        vowel_tags = []
-        
-        for char in word:
-            if self.is_geez_character(char):
-                base, vowel = self.break_syllable(char)
-                result.append(base)
-                if vowel:
-                    vowel_tags.append(vowel)
-            else:
-                result.append(char)
+        # Both parts are built by str.translate over the whole word
+        bases, vowel_tags = self.codec.split_bases_and_markers(word)
         
         # Combine base consonants with vowel tags
-        return ''.join(result) + ''.join(vowel_tags)
+        return bases + vowel_tags
     
     def restore_word(self, broken_word: str) -> str:
         """
@@ -120,43 +147,140 @@ class GeEzSyllableBreaker:
         result = []
         vowel_index = 0
         
+        composition_table = self.codec.composition_table
         for consonant in consonants:
-            if (self.is_geez_character(consonant) and 
-                vowel_index < len(vowels)):
+            # Only Ge'ez consonants have entries in the composition table
+            syllable = composition_table.get(consonant + vowels[vowel_index]) if vowel_index < len(vowels) else None
+            if syllable is not None:
                 # Add vowel to consonant
-                vowel_marker = vowels[vowel_index]
-                vowel_order = self.marker_to_vowel[vowel_marker]
-                original_code = ord(consonant) + vowel_order
-                result.append(chr(original_code))
+                result.append(syllable)
                 vowel_index += 1
             else:
                 result.append(consonant)
         
         return ''.join(result)
     
+    def break_text(self, text: str, layout: str = LAYOUT_WORD_END) -> str:
+        """
+        Convert a whole text chunk to Virtual Abjad at once, vectorised with NumPy.
+        
+        With LAYOUT_WORD_END every whitespace separated word is broken like
+        break_word, and the whitespace is kept. With LAYOUT_INTERLEAVED every
+        vowel marker follows its base consonant.
+        """
+        return self.codec.break_text(text, layout)
+    
+    def break_text_file(self, input_path: str, output_path: str, layout: str = LAYOUT_WORD_END,
+                        chunk_chars: int = DEFAULT_CHUNK_CHARS):
+        """
+        Convert a text file of any size to Virtual Abjad, chunk_chars characters at a time.
+        
+        Chunks are cut after their last whitespace character, so no word is split between two chunks.
+        A run of more than chunk_chars characters without whitespace is not a word, and is cut anyway,
+        before a character that isn't a combining mark, so the text read is never more than twice chunk_chars.
+        """
+        with open(input_path, 'r', encoding='utf-8', newline='') as input_file, \
+                open(output_path, 'w', encoding='utf-8', newline='') as output_file:
+            remainder = ''
+            chunk = input_file.read(chunk_chars)
+            while chunk:
+                text = remainder + chunk
+                # The interleaved layout doesn't depend on the words, any cut works
+                cut = len(text)
+                if layout == LAYOUT_WORD_END:
+                    cut -= LAST_WORD_PATTERN.match(text[::-1]).end()
+                    if len(text) - cut > chunk_chars:
+                        cut = len(text) - 1
+                        while cut > 0 and unicodedata.combining(text[cut]):
+                            cut -= 1
+                output_file.write(self.break_text(text[:cut], layout))
+                remainder = text[cut:]
+                chunk = input_file.read(chunk_chars)
+            output_file.write(self.break_text(remainder, layout))
+    
+    def restore_text(self, text: str) -> str:
+        """
+        Restore a whole decoded document at once, vectorised with NumPy.
+        
+        Every whitespace separated word is restored like restore_word, and the
+        whitespace is kept.
+        """
+        return self.codec.restore_text(text)
+    
+    def restore_words(self, words) -> list:
+        """Restore many words at once, each one like restore_word."""
+        return self.codec.restore_words(words)
+    
     def get_alphabet(self):
         """Get all Ge'ez characters for SPLINTER."""
         return self.all_geez_chars
     
-    def preprocess_text_file(self, input_path: str, output_path: str):
+    def preprocess_text_file(self, input_path: str, output_path: str, n_workers: int = 1,
+                             chunk_lines: int = DEFAULT_CHUNK_LINES):
         """
         Preprocess a text file: convert all Ge'ez words to Virtual Abjad.
         
+        The file is streamed chunk_lines lines at a time, so memory doesn't
+        grow with the file. With n_workers > 1 the chunks are processed by a
+        pool of workers and written back in order.
+        
         Args:
             input_path: Path to original Ge'ez text file
             output_path: Path to save processed text
+            n_workers: Worker processes (1 = no pool)
+            chunk_lines: Lines per chunk
         """
-        with open(input_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        start = time.perf_counter()
+        last_report = start
+        lines_number = 0
         
-        processed_lines = []
-        for line in lines:
-            words = line.strip().split()
-            processed_words = [self.break_word(word) for word in words]
-            processed_lines.append(' '.join(processed_words))
+        with open(input_path, 'r', encoding='utf-8') as input_file, \
+                open(output_path, 'w', encoding='utf-8') as output_file:
+            chunks = iter(lambda: list(islice(input_file, chunk_lines)), [])
+            pool = multiprocessing.Pool(n_workers, initializer=_init_preprocessing_worker) if n_workers > 1 else None
+            try:
+                if pool is not None:
+                    # in the input order, with at most PENDING_CHUNKS_PER_WORKER chunks per worker read and not written yet
+                    processed_chunks = imap_bounded(pool, _preprocess_lines_chunk, chunks, n_workers * PENDING_CHUNKS_PER_WORKER)
+                else:
+                    processed_chunks = map(self.preprocess_lines, chunks)
+                for processed_chunk, chunk_lines_number in processed_chunks:
+                    # Lines are joined by '\n', without one after the last line
+                    if lines_number > 0:
+                        output_file.write('\n')
+                    output_file.write(processed_chunk)
+                    lines_number += chunk_lines_number
+                    
+                    now = time.perf_counter()
+                    if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                        self.report_progress(input_path, lines_number, now - start)
+                        last_report = now
+            finally:
+                if pool is not None:
+                    pool.terminate()
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(processed_lines))
+        # the last report is the summary of the whole file
+        self.report_progress(input_path, lines_number, time.perf_counter() - start, output_path)
+    
+    @staticmethod
+    def report_progress(input_path: str, lines_number: int, seconds: float, output_path: str = None):
+        """
+        Print the lines processed so far and their rate, with the output path
+        once the file is done.
+        """
+        progress = (f"Processed {lines_number} lines from {input_path} in {seconds:.1f}s "
+                    f"({lines_number / max(seconds, 1e-9):.0f} lines/sec)")
+        if output_path is not None:
+            progress += f", saved to {output_path}"
+        print(progress)
+    
+    def preprocess_lines(self, lines) -> tuple:
+        """
+        Convert a chunk of lines to Virtual Abjad, with the words of every line
+        separated by single spaces.
         
-        print(f"Processed {len(lines)} lines from {input_path}")
-        print(f"Saved to {output_path}")
\ No newline at end of file
+        Returns:
+            Tuple of (processed lines joined by '\n', number of lines)
+        """
+        text = '\n'.join(' '.join(line.split()) for line in lines)
+        return self.break_text(text, LAYOUT_WORD_END), len(lines)
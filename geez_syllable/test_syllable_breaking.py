@@ -5,6 +5,10 @@ Quick test of Ge'ez syllable breaking.
 
 import sys
 import os
+import random
+import tempfile
+import io
+from contextlib import redirect_stdout
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -52,5 +56,105 @@ def test_breaking():
     print("\n" + "=" * 50)
     print("✅ Syllable breaking working correctly!")
 
+def test_round_trip_over_block():
+    """Every Ge'ez syllable survives break_word and the batch restore APIs."""
+    breaker = GeEzSyllableBreaker()
+    syllables = [chr(code) for code in range(breaker.GEEZ_RANGE_START, breaker.GEEZ_RANGE_END + 1)]
+    
+    # Every syllable alone, then random words over the whole block with some other characters
+    rng = random.Random(0)
+    words = syllables + [
+        ''.join(rng.choices(syllables + list('ab1.'), k=rng.randint(1, 10)))
+        for _ in range(5000)
+    ]
+    broken_words = [breaker.break_word(word) for word in words]
+    
+    assert [breaker.restore_word(word) for word in broken_words] == words
+    assert breaker.restore_words(broken_words) == words
+    assert breaker.restore_text(' '.join(broken_words)) == ' '.join(words)
+    assert breaker.restore_text(breaker.break_text('\n'.join(words))) == '\n'.join(words)
+    print(f"✅ {len(words)} words restored from Virtual Abjad")
+
+def test_preprocess_text_file_in_pool():
+    """The pool of workers writes the same file as preprocessing it sequentially."""
+    breaker = GeEzSyllableBreaker()
+    syllables = [chr(code) for code in range(breaker.GEEZ_RANGE_START, breaker.GEEZ_RANGE_END + 1)]
+    rng = random.Random(1)
+    lines = [' '.join(''.join(rng.choices(syllables + list('ab1.'), k=rng.randint(1, 8)))
+                      for _ in range(rng.randint(0, 12)))
+             for _ in range(500)]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, 'input.txt')
+        with open(input_path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines))
+        outputs = []
+        for n_workers in (1, 2):
+            output_path = os.path.join(directory, f'output-{n_workers}.txt')
+            breaker.preprocess_text_file(input_path, output_path, n_workers=n_workers, chunk_lines=7)
+            with open(output_path, 'r', encoding='utf-8') as file:
+                outputs.append(file.read())
+    
+    assert outputs[1] == outputs[0]
+    assert breaker.restore_text(outputs[0]) == '\n'.join(lines)
+    print(f"✅ {len(lines)} lines preprocessed the same way by the pool")
+
+def test_break_text_file_chunks():
+    """Words separated by any whitespace are never split, and a file without whitespace is still read in chunks."""
+    breaker = GeEzSyllableBreaker()
+    syllables = [chr(code) for code in range(breaker.GEEZ_RANGE_START, breaker.GEEZ_RANGE_END + 1)]
+    rng = random.Random(2)
+    words = [''.join(rng.choices(syllables, k=rng.randint(1, 8))) for _ in range(2000)]
+    texts = {
+        'tabs': '\t'.join(words),
+        'unicode_spaces': ''.join(word + rng.choice('\u00a0\u3000\x0b\x1c') for word in words),
+        'one_word': ''.join(words),
+    }
+    
+    # the lengths of the texts broken at once
+    broken_lengths = []
+    break_text = breaker.break_text
+    breaker.break_text = lambda text, *args: broken_lengths.append(len(text)) or break_text(text, *args)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for name, text in texts.items():
+            input_path = os.path.join(directory, f'{name}.txt')
+            output_path = os.path.join(directory, f'{name}-broken.txt')
+            with open(input_path, 'w', encoding='utf-8', newline='') as file:
+                file.write(text)
+            breaker.break_text_file(input_path, output_path, chunk_chars=100)
+            with open(output_path, 'r', encoding='utf-8', newline='') as file:
+                broken_text = file.read()
+            assert max(broken_lengths) <= 200
+            broken_lengths.clear()
+            if name == 'one_word':
+                # cut every chunk_chars characters, like breaking the pieces one by one
+                assert sorted(broken_text) == sorted(break_text(text))
+                assert broken_text != break_text(text)
+            else:
+                assert broken_text == break_text(text)
+    print(f"✅ {len(texts)} files broken in chunks")
+
+def test_preprocess_text_file_reports_once():
+    """A short file is summarized by a single progress report, with its rate and output path."""
+    breaker = GeEzSyllableBreaker()
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, 'input.txt')
+        output_path = os.path.join(directory, 'output.txt')
+        with open(input_path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(['ሰላም ዓለም'] * 30))
+        with redirect_stdout(io.StringIO()) as stdout:
+            breaker.preprocess_text_file(input_path, output_path, chunk_lines=7)
+    
+    reports = stdout.getvalue().splitlines()
+    assert len(reports) == 1
+    assert reports[0].startswith(f"Processed 30 lines from {input_path} in ")
+    assert reports[0].endswith(f" lines/sec), saved to {output_path}")
+    print("✅ preprocessing summarized by its last progress report")
+
 if __name__ == "__main__":
-    test_breaking()
\ No newline at end of file
+    test_breaking()
+    test_round_trip_over_block()
+    test_preprocess_text_file_in_pool()
+    test_break_text_file_chunks()
+    test_preprocess_text_file_reports_once()
\ No newline at end of file
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from src.logger import get_logger
+from src.utils.path_utils import get_cache_dir
+
+# bump when the layout of the cached artifacts changes, so old entries are never served
+CACHE_VERSION = 1
+DEFAULT_MAX_SIZE_BYTES = 200 * 1024 ** 3
+DEFAULT_MAX_AGE_DAYS = 90
+
+
+class ArtifactsCache:
+    """
+    Content-addressed cache of training artifacts (word dicts, reductions maps).
+    Every entry is a directory named by the hash of everything its content depends on, so a changed
+    corpus, language utils or trainer parameter gets a new entry instead of silently reusing an old one.
+    Entries are built in a staging directory and published atomically.
+    Entries not used for max_age_days are evicted, then the least recently used ones until the cache fits in max_size_bytes.
+    """
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, cache_dir=None, max_size_bytes=DEFAULT_MAX_SIZE_BYTES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        self.max_size_bytes = max_size_bytes
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(**key_parts):
+        key_parts['cache_version'] = CACHE_VERSION
+        serialized_parts = json.dumps(key_parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serialized_parts.encode('utf-8')).hexdigest()
+
+    def get_entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get_staging_path(self, key):
+        # not cleaned on purpose: an interrupted build can resume from the checkpoints it left there
+        staging_path = f'{self.get_entry_path(key)}.tmp'
+        os.makedirs(staging_path, exist_ok=True)
+        return staging_path
+
+    def get(self, key, description=''):
+        entry_path = self.get_entry_path(key)
+        if not os.path.exists(os.path.join(entry_path, self.META_FILE)):
+            self.misses += 1
+            get_logger().info(f'artifacts cache miss: {description} ({key[:12]})')
+            return None
+
+        self.hits += 1
+        get_logger().info(f'artifacts cache hit: {description} ({key[:12]})')
+        meta = self.read_meta(entry_path)
+        meta['last_access'] = time.time()
+        self.write_meta(entry_path, meta)
+        return entry_path
+
+    def publish(self, key, description=''):
+        entry_path = self.get_entry_path(key)
+        staging_path = self.get_staging_path(key)
+        now = time.time()
+        self.write_meta(staging_path, {'description': description, 'created': now, 'last_access': now})
+        if os.path.exists(entry_path):
+            shutil.rmtree(entry_path)
+        os.replace(staging_path, entry_path)
+        get_logger().info(f'artifacts cache stored: {description} ({key[:12]})')
+        self.evict(protected_entry_path=entry_path)
+        return entry_path
+
+    def evict(self, protected_entry_path=None):
+        if not os.path.exists(self.cache_dir):
+            return
+
+        entries = list()
+        # the protected entry is never evicted, but it takes its room in the cache
+        protected_size = 0
+        for key in os.listdir(self.cache_dir):
+            entry_path = self.get_entry_path(key)
+            if entry_path == protected_entry_path:
+                protected_size = self.get_dir_size(entry_path)
+            elif os.path.exists(os.path.join(entry_path, self.META_FILE)):
+                entries.append((self.read_meta(entry_path)['last_access'], self.get_dir_size(entry_path), entry_path))
+
+        # least recently used first
+        entries.sort()
+        total_size = protected_size + sum(size for _, size, _ in entries)
+        min_last_access = time.time() - self.max_age_days * 24 * 60 * 60
+        for last_access, size, entry_path in entries:
+            if last_access >= min_last_access and total_size <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry_path)
+            total_size -= size
+            get_logger().info(f'artifacts cache evicted: {os.path.basename(entry_path)[:12]} ({size / 1024 ** 2:.1f} MB)')
+
+    def get_stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def read_meta(self, entry_path):
+        with open(os.path.join(entry_path, self.META_FILE), 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def write_meta(self, entry_path, meta):
+        with open(os.path.join(entry_path, self.META_FILE), 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+
+    @staticmethod
+    def get_dir_size(path):
+        return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
@@ -0,0 +1,232 @@
+import json
+import mmap
+import os
+import shutil
+
+import numpy as np
+
+# words decoded at once when iterating a length bucket
+ITERATION_CHUNK_SIZE = 65536
+
+
+class CompactWordsDict:
+    """
+    Read-only {word: count} dict stored as a directory of flat files:
+    the UTF-8 words concatenated into one blob, an offsets array into it and a counts array (int64, or float64 for scores).
+    Words are sorted by (length, word), so each length bucket is a contiguous range of the memory-mapped
+    files, and can be iterated without building a Python dict.
+    """
+
+    WORDS_FILE = 'words.bin'
+    OFFSETS_FILE = 'offsets.npy'
+    COUNTS_FILE = 'counts.npy'
+    LENGTHS_FILE = 'lengths.json'
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = np.load(os.path.join(path, self.OFFSETS_FILE), mmap_mode='r')
+        # indexing a memoryview returns Python ints, much faster than numpy scalars in the binary search
+        self.offsets_view = memoryview(self.offsets).cast('B').cast('q')
+        self.counts = np.load(os.path.join(path, self.COUNTS_FILE), mmap_mode='r')
+        with open(os.path.join(path, self.LENGTHS_FILE), 'r', encoding='utf-8') as file:
+            # word length -> [first word index, last word index + 1]
+            self.length_ranges = {int(length): tuple(word_range) for length, word_range in json.load(file).items()}
+
+        self.words_file = open(os.path.join(path, self.WORDS_FILE), 'rb')
+        if os.path.getsize(self.words_file.name) > 0:
+            self.words_blob = mmap.mmap(self.words_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # an empty file can't be memory-mapped
+            self.words_blob = b''
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, word):
+        return self.find_word_index(word) is not None
+
+    def __getitem__(self, word):
+        index = self.find_word_index(word)
+        if index is None:
+            raise KeyError(word)
+        return self.counts[index].item()
+
+    def __iter__(self):
+        return self.keys()
+
+    def get(self, word, default=None):
+        index = self.find_word_index(word)
+        return default if index is None else self.counts[index].item()
+
+    def get_lengths(self):
+        return sorted(self.length_ranges.keys())
+
+    def get_length_items(self, word_length):
+        if word_length not in self.length_ranges:
+            return
+        start, stop = self.length_ranges[word_length]
+        for chunk_start in range(start, stop, ITERATION_CHUNK_SIZE):
+            chunk_stop = min(chunk_start + ITERATION_CHUNK_SIZE, stop)
+            yield from self.get_range_items(chunk_start, chunk_stop)
+
+    def get_range_items(self, start, stop):
+        offsets = self.offsets[start:stop + 1].tolist()
+        chunk_bytes = self.words_blob[offsets[0]:offsets[-1]]
+        base_offset = offsets[0]
+        counts = self.counts[start:stop].tolist()
+        for i in range(stop - start):
+            word = chunk_bytes[offsets[i] - base_offset:offsets[i + 1] - base_offset].decode('utf-8')
+            yield word, counts[i]
+
+    def items(self):
+        for word_length in self.get_lengths():
+            yield from self.get_length_items(word_length)
+
+    def get_items_with_min_count(self, min_count):
+        # the counts are filtered in numpy first, so the words of the rare counts are never decoded
+        for word_length in self.get_lengths():
+            start, stop = self.length_ranges[word_length]
+            for chunk_start in range(start, stop, ITERATION_CHUNK_SIZE):
+                chunk_stop = min(chunk_start + ITERATION_CHUNK_SIZE, stop)
+                counts = self.counts[chunk_start:chunk_stop]
+                for index in (np.flatnonzero(counts >= min_count) + chunk_start).tolist():
+                    yield self.get_word(index), self.counts[index].item()
+
+    def keys(self):
+        return (word for word, _ in self.items())
+
+    def values(self):
+        return (count.item() for count in self.counts)
+
+    def get_word(self, index):
+        return self.words_blob[int(self.offsets[index]):int(self.offsets[index + 1])].decode('utf-8')
+
+    def find_word_index(self, word):
+        index, is_found = self.search_word(word)
+        return index if is_found else None
+
+    def search_word(self, word):
+        # (index of the word, True) if it is in the dict, otherwise (index it would be inserted at, False)
+        word_length = len(word)
+        if word_length not in self.length_ranges:
+            return min((start for length, (start, _) in self.length_ranges.items() if length > word_length), default=len(self)), False
+        # words of the same length are sorted, and UTF-8 bytes order is the same as code points order
+        word_bytes = word.encode('utf-8')
+        offsets = self.offsets_view
+        low, high = self.length_ranges[word_length]
+        while low < high:
+            middle = (low + high) // 2
+            middle_bytes = self.words_blob[offsets[middle]:offsets[middle + 1]]
+            if middle_bytes < word_bytes:
+                low = middle + 1
+            elif middle_bytes > word_bytes:
+                high = middle
+            else:
+                return middle, True
+        return low, False
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def close(self):
+        if isinstance(self.words_blob, mmap.mmap):
+            self.words_blob.close()
+        self.words_file.close()
+
+    @staticmethod
+    def save(words_dict, path):
+        sorted_words = sorted(words_dict.keys(), key=lambda word: (len(word), word))
+
+        length_ranges = dict()
+        for index, word in enumerate(sorted_words):
+            word_length = len(word)
+            if word_length not in length_ranges:
+                length_ranges[word_length] = [index, index]
+            length_ranges[word_length][1] = index + 1
+
+        encoded_words = [word.encode('utf-8') for word in sorted_words]
+        offsets = np.zeros(len(encoded_words) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.array([len(encoded_word) for encoded_word in encoded_words], dtype=np.int64))
+        values = [words_dict[word] for word in sorted_words]
+        counts_dtype = np.float64 if any(isinstance(value, float) for value in values) else np.int64
+        counts = np.array(values, dtype=counts_dtype)
+
+        CompactWordsDict.save_files(b''.join(encoded_words), offsets, counts, length_ranges, path)
+
+    @staticmethod
+    def save_files(words_blob, offsets, counts, length_ranges, path):
+        # files are written into a temporary directory first, so a failed save never leaves a partial words dict
+        tmp_path = f'{path}.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        with open(os.path.join(tmp_path, CompactWordsDict.WORDS_FILE), 'wb') as file:
+            file.write(words_blob)
+        np.save(os.path.join(tmp_path, CompactWordsDict.OFFSETS_FILE), offsets)
+        np.save(os.path.join(tmp_path, CompactWordsDict.COUNTS_FILE), counts)
+        with open(os.path.join(tmp_path, CompactWordsDict.LENGTHS_FILE), 'w', encoding='utf-8') as file:
+            json.dump(length_ranges, file)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def save_updated(words_dict, updated_words, path):
+        """
+        Saves a CompactWordsDict with the counts of updated_words, new words or words whose count changed,
+        without decoding the words that didn't change.
+        """
+        changed_indexes = list()
+        changed_counts = list()
+        new_words = list()
+        for word, count in updated_words.items():
+            index, is_found = words_dict.search_word(word)
+            if is_found:
+                changed_indexes.append(index)
+                changed_counts.append(count)
+            else:
+                new_words.append(word)
+        new_words.sort(key=lambda word: (len(word), word))
+        insertion_indexes = [words_dict.search_word(word)[0] for word in new_words]
+
+        is_float = words_dict.counts.dtype == np.float64 or any(isinstance(count, float) for count in updated_words.values())
+        counts_dtype = np.float64 if is_float else np.int64
+        counts = np.array(words_dict.counts, dtype=counts_dtype)
+        counts[changed_indexes] = changed_counts
+        counts = np.insert(counts, insertion_indexes, np.array([updated_words[word] for word in new_words], dtype=counts_dtype))
+
+        # the new words are spliced into the words blob between the old words
+        encoded_new_words = [word.encode('utf-8') for word in new_words]
+        old_offsets = words_dict.offsets_view
+        words_bytes_lengths = np.insert(np.diff(words_dict.offsets), insertion_indexes, [len(encoded_word) for encoded_word in encoded_new_words])
+        offsets = np.zeros(len(words_bytes_lengths) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(words_bytes_lengths)
+        blob_parts = list()
+        blob_start = 0
+        for insertion_index, encoded_word in zip(insertion_indexes, encoded_new_words):
+            blob_parts.append(words_dict.words_blob[blob_start:old_offsets[insertion_index]])
+            blob_parts.append(encoded_word)
+            blob_start = old_offsets[insertion_index]
+        blob_parts.append(words_dict.words_blob[blob_start:old_offsets[len(words_dict)]])
+
+        words_numbers = {word_length: stop - start for word_length, (start, stop) in words_dict.length_ranges.items()}
+        for word in new_words:
+            words_numbers[len(word)] = words_numbers.get(len(word), 0) + 1
+        length_ranges = dict()
+        start = 0
+        for word_length in sorted(words_numbers.keys()):
+            length_ranges[word_length] = [start, start + words_numbers[word_length]]
+            start += words_numbers[word_length]
+
+        CompactWordsDict.save_files(b''.join(blob_parts), offsets, counts, length_ranges, path)
+
+    @staticmethod
+    def convert_json_file(json_path, path):
+        with open(json_path, 'r', encoding='utf-8') as file:
+            words_dict = json.load(file)
+        CompactWordsDict.save(words_dict, path)
+
+    def save_as_json_file(self, json_path):
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=4)
@@ -0,0 +1,95 @@
+import queue
+import threading
+from contextlib import nullcontext
+
+from src.TextProcessorInterface import TextProcessorInterface
+
+DEFAULT_QUEUE_DEPTH = 4
+WRITE_BUFFER_SIZE = 1024 ** 2
+# how often a blocked reader checks whether the pipeline was stopped
+QUEUE_POLL_SECONDS = 0.1
+# put by the reader and the encoder after their last batch
+END_OF_BATCHES = object()
+
+
+class CorpusEncodingPipeline:
+    """
+    Encodes a corpus into a text file with a reader thread, the encoder (a pool of n_workers processes if n_workers > 1)
+    and a writer thread, so reading, encoding and writing overlap.
+    The queues between them hold at most queue_depth batches, which caps the memory, and the file is opened once.
+    Batches are written in the order they are read, so the file is the same as encoding the batches one by one.
+    """
+
+    def __init__(self, text_processor: TextProcessorInterface, n_workers=1, queue_depth=DEFAULT_QUEUE_DEPTH):
+        self.text_processor = text_processor
+        self.n_workers = n_workers
+        self.queue_depth = queue_depth
+        self.read_batches = queue.Queue(maxsize=queue_depth)
+        self.encoded_batches = queue.Queue(maxsize=queue_depth)
+        self.stopped = threading.Event()
+        self.reader_error = None
+        self.writer_error = None
+        self.articles_number = 0
+        self.words_number = 0
+
+    def run(self, dataset_batches, output_path):
+        # appends to output_path, returns the numbers of articles and words written
+        reader = threading.Thread(target=self.read, args=(dataset_batches,), daemon=True)
+        writer = threading.Thread(target=self.write, args=(output_path,), daemon=True)
+        reader.start()
+        writer.start()
+        try:
+            with self.text_processor.get_processing_pool(self.n_workers) if self.n_workers > 1 else nullcontext() as pool:
+                self.encode(pool)
+        finally:
+            # the reader may be blocked on a full queue if the encoder failed
+            self.stopped.set()
+            self.encoded_batches.put(END_OF_BATCHES)
+            writer.join()
+            reader.join()
+
+        for error in (self.reader_error, self.writer_error):
+            if error is not None:
+                raise error
+        return self.articles_number, self.words_number
+
+    def read(self, dataset_batches):
+        try:
+            for dataset_batch in dataset_batches:
+                if not self.put_unless_stopped(self.read_batches, dataset_batch["text"]):
+                    return
+        except Exception as e:
+            self.reader_error = e
+        self.put_unless_stopped(self.read_batches, END_OF_BATCHES)
+
+    def encode(self, pool):
+        while True:
+            texts = self.read_batches.get()
+            if texts is END_OF_BATCHES or self.writer_error is not None:
+                return
+            self.encoded_batches.put(self.text_processor.process_batch(texts, self.n_workers, pool))
+
+    def write(self, output_path):
+        try:
+            with open(output_path, 'a', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as file:
+                encoded_articles_list = self.encoded_batches.get()
+                while encoded_articles_list is not END_OF_BATCHES:
+                    file.write("\n".join(encoded_articles_list) + "\n")
+                    self.articles_number += len(encoded_articles_list)
+                    self.words_number += sum(len(encoded_article.split()) for encoded_article in encoded_articles_list)
+                    encoded_articles_list = self.encoded_batches.get()
+            return
+        except Exception as e:
+            self.writer_error = e
+        # keeps taking the batches after a failure, so the encoder never blocks on a full queue
+        while self.encoded_batches.get() is not END_OF_BATCHES:
+            pass
+
+    def put_unless_stopped(self, batches_queue, item):
+        while not self.stopped.is_set():
+            try:
+                batches_queue.put(item, timeout=QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -1,7 +1,43 @@
 import json
+import math
+import multiprocessing
 import os
 import re
-from collections import defaultdict
+from collections import Counter, defaultdict
+from itertools import islice
+
+from datasets import Dataset, IterableDataset
+
+from src.logger import get_logger
+from src.utils.utils import imap_bounded
+
+# articles counted in a single chunk, when the corpus is consumed as a stream
+DEFAULT_ARTICLES_CHUNK_SIZE = 1000
+# contiguous shards per worker, when the corpus is a map-style dataset
+SHARDS_PER_WORKER = 4
+# articles between two checkpoints of the partial words counter
+DEFAULT_CHECKPOINT_EVERY = 1000000
+
+# the extractor of a pool worker, and the map-style corpus its (start, stop) tasks select from
+_counting_worker_extractor = None
+_counting_worker_corpus = None
+
+
+def _init_counting_worker(language_utils, corpus=None):
+    global _counting_worker_extractor, _counting_worker_corpus
+    _counting_worker_extractor = CorpusWordsExtractor(language_utils)
+    _counting_worker_corpus = corpus
+
+
+def _count_articles_chunk(articles_text):
+    return len(articles_text), _counting_worker_extractor.count_words(articles_text)
+
+
+def _count_dataset_range(task):
+    start, stop = task
+    articles = _counting_worker_corpus.select(range(start, stop))
+    return stop - start, _counting_worker_extractor.count_words(item['text'] for item in articles)
+
 
 class CorpusWordsExtractor:
     def __init__(self, language_utils, dataset_name=None):
@@ -17,12 +53,13 @@ class CorpusWordsExtractor:
             json.dump(words, f, ensure_ascii=False, indent=4)
         return words  """
 
-    def convert_corpus_to_words_dict_file(self, corpus, output_filename):
-        words = self.get_words_from_corpus(corpus) 
-    
+    def convert_corpus_to_words_dict_file(self, corpus, output_filename, n_workers=1, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
         # Ensure the output filename is valid
         if not output_filename or output_filename.strip() == '':
             raise ValueError(f"Invalid output filename: '{output_filename}'")
+
+        checkpoint_path = f'{output_filename}.checkpoint'
+        words = self.get_words_from_corpus(corpus, n_workers, checkpoint_path, checkpoint_every)
     
         # Create directory if it doesn't exist
         output_dir = os.path.dirname(output_filename)
@@ -31,13 +68,88 @@ class CorpusWordsExtractor:
     
         with open(output_filename, 'w', encoding='utf-8') as f:
             json.dump(words, f, ensure_ascii=False, indent=4)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
         return words    
 
-    def get_words_from_corpus(self, corpus):
-        articles_text = [item['text'] for item in corpus]
-        return self.extract_words_with_frequencies(articles_text)
+    def get_words_from_corpus(self, corpus, n_workers=1, checkpoint_path=None, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        # the corpus is consumed lazily, chunk by chunk, so only the words counter is kept in memory.
+        # chunks are merged in corpus order, so the words keep their first-occurrence order for any number of workers.
+        words, articles_read = self.load_checkpoint(checkpoint_path)
+        if articles_read > 0:
+            get_logger().info(f'resuming words counting from checkpoint {checkpoint_path} after {articles_read} articles')
+
+        last_checkpoint_articles_read = articles_read
+        for chunk_articles_number, chunk_words in self.count_corpus_in_chunks(corpus, n_workers, articles_read):
+            words.update(chunk_words)
+            articles_read += chunk_articles_number
+            if checkpoint_path is not None and articles_read - last_checkpoint_articles_read >= checkpoint_every:
+                self.save_checkpoint(checkpoint_path, words, articles_read)
+                last_checkpoint_articles_read = articles_read
+        return dict(words)
+
+    def count_corpus_in_chunks(self, corpus, n_workers, start):
+        if n_workers <= 1:
+            for articles_text in self.get_articles_chunks(self.skip_articles(corpus, start)):
+                yield len(articles_text), self.count_words(articles_text)
+
+        elif isinstance(corpus, Dataset):
+            # every worker reads its own contiguous range of the dataset, so no text is sent through the pool
+            range_size = max(math.ceil((len(corpus) - start) / (n_workers * SHARDS_PER_WORKER)), 1)
+            tasks = [(range_start, min(range_start + range_size, len(corpus))) for range_start in range(start, len(corpus), range_size)]
+            with multiprocessing.Pool(n_workers, initializer=_init_counting_worker, initargs=(self.language_utils, corpus)) as pool:
+                yield from pool.imap(_count_dataset_range, tasks)
+
+        else:
+            articles_chunks = self.get_articles_chunks(self.skip_articles(corpus, start))
+            with multiprocessing.Pool(n_workers, initializer=_init_counting_worker, initargs=(self.language_utils,)) as pool:
+                yield from imap_bounded(pool, _count_articles_chunk, articles_chunks, n_workers * 2)
+
+    @staticmethod
+    def skip_articles(corpus, articles_number):
+        if articles_number == 0:
+            return corpus
+        if isinstance(corpus, Dataset):
+            return corpus.select(range(articles_number, len(corpus)))
+        if isinstance(corpus, IterableDataset):
+            return corpus.skip(articles_number)
+        return islice(corpus, articles_number, None)
+
+    @staticmethod
+    def get_articles_chunks(corpus, chunk_size=DEFAULT_ARTICLES_CHUNK_SIZE):
+        chunk = list()
+        for item in corpus:
+            chunk.append(item['text'])
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = list()
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def load_checkpoint(checkpoint_path):
+        if checkpoint_path is None or not os.path.exists(checkpoint_path):
+            return Counter(), 0
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        return Counter(checkpoint['words']), checkpoint['articles_read']
+
+    @staticmethod
+    def save_checkpoint(checkpoint_path, words, articles_read):
+        checkpoint_dir = os.path.dirname(checkpoint_path)
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+        # write to a temporary file first, so an interrupted write never replaces a valid checkpoint
+        with open(f'{checkpoint_path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'articles_read': articles_read, 'words': words}, f, ensure_ascii=False)
+        os.replace(f'{checkpoint_path}.tmp', checkpoint_path)
+        get_logger().info(f'saved words counting checkpoint after {articles_read} articles')
+
+    def extract_words_with_frequencies(self, articles_text):
+        return dict(self.count_words(articles_text))
 
-    def extract_words_with_frequencies(self, articles_text):    
+    def count_words(self, articles_text):
         if self.language_utils is None:
             raise ValueError("CorpusWordsExtractor initialized with NoneType language_utils. Check SplinterTrainer init.")
 
@@ -54,4 +166,4 @@ class CorpusWordsExtractor:
                     processed_word = self.language_utils.replace_final_letters(word)
                     words[processed_word] += 1
                     
-        return dict(words)
\ No newline at end of file
+        return words
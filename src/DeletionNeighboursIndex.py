@@ -0,0 +1,202 @@
+import multiprocessing
+from itertools import groupby, islice
+from operator import itemgetter
+
+import numpy as np
+
+from src.logger import get_logger
+from src.utils.utils import get_permutation, imap_bounded
+
+DEFAULT_SHARD_SIZE = 100000
+# shards handed to the pool and not stored yet, per worker
+PENDING_SHARDS_PER_WORKER = 2
+
+# the index of a pool worker, and the words of its buckets listed once, so a (word_length, start, stop) task is a slice
+_shard_worker_index = None
+_shard_worker_words_by_length = None
+
+
+def _init_shard_worker(index_class, words_dict_by_length, letters_for_reductions, shorter_words_dict_by_length):
+    global _shard_worker_index, _shard_worker_words_by_length
+    _shard_worker_index = index_class(words_dict_by_length, letters_for_reductions, shorter_words_dict_by_length=shorter_words_dict_by_length)
+    _shard_worker_words_by_length = {word_length: list(length_words) for word_length, length_words in words_dict_by_length.items()}
+
+
+def _build_shard(task):
+    word_length, start, stop = task
+    words = _shard_worker_words_by_length[word_length][start:stop]
+    return word_length, _shard_worker_index.build_shard(words, word_length)
+
+
+class DeletionNeighboursIndex:
+    """
+    Maps every word of a length bucket to its valid single-letter deletions:
+    (position, letter, shorter_word) edges where shorter_word exists in the previous length bucket.
+    Built once per length, so both passes of the trainer can read the edges instead of probing the words dict again.
+    Only the positions are kept, in flat arrays per length, since the letter and the shorter word follow from the word.
+    A length is built in shards, each compacted into arrays as soon as it is built. Once a length doesn't fit
+    in max_memory_bytes, its arrays are dropped and only its reduction counts are kept, its edges are computed again when read.
+    The shorter words can be looked up in other buckets than the indexed words, e.g. all the words when only a sample is indexed.
+    """
+
+    def __init__(self, words_dict_by_length, letters_for_reductions: [str] = None, max_memory_bytes: int = None,
+                 shorter_words_dict_by_length=None):
+        self.words_dict_by_length = words_dict_by_length
+        self.shorter_words_dict_by_length = shorter_words_dict_by_length if shorter_words_dict_by_length is not None else words_dict_by_length
+        self.letters_for_reductions = letters_for_reductions
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        # word length -> (positions, offsets): the deletion positions of the i-th word of the bucket
+        # are positions[offsets[i]:offsets[i + 1]]
+        self.compact_edges_by_length = dict()
+        # word length -> {"position:letter": number of words of the length with this valid deletion}
+        self.reduction_counts_by_length = dict()
+
+    def build_length(self, word_length, shard_size=DEFAULT_SHARD_SIZE):
+        if word_length not in self.reduction_counts_by_length:
+            self.store_length_shards(word_length, (self.build_shard(words, word_length)
+                                                   for words in self.get_length_shards_words(word_length, shard_size)))
+
+    def count_length_reductions(self, word_length):
+        self.build_length(word_length)
+        return dict(self.reduction_counts_by_length[word_length])
+
+    def get_length_words_edges(self, word_length):
+        # (word, edges) of every word of the bucket, in the bucket order
+        self.build_length(word_length)
+        if word_length not in self.compact_edges_by_length:
+            get_logger().info(f"Deletions of word length {word_length} weren't kept, computing them again")
+            for words in self.get_length_shards_words(word_length):
+                shard_edges = self.build_shard_edges(words, word_length)
+                for word in words:
+                    yield word, shard_edges.get(word, ())
+            return
+
+        positions, offsets = self.compact_edges_by_length[word_length]
+        positions = positions.tolist()
+        offsets = offsets.tolist()
+        for index, word in enumerate(self.words_dict_by_length.get(word_length, dict())):
+            yield word, tuple((position, word[position], get_permutation(word, position, word_length))
+                              for position in positions[offsets[index]:offsets[index + 1]])
+
+    def get_length_edges(self, word_length):
+        return {word: word_edges for word, word_edges in self.get_length_words_edges(word_length) if len(word_edges) > 0}
+
+    def get_length_shards_words(self, word_length, shard_size=DEFAULT_SHARD_SIZE):
+        words = iter(self.words_dict_by_length.get(word_length, dict()))
+        shard_words = list(islice(words, shard_size))
+        while len(shard_words) > 0:
+            yield shard_words
+            shard_words = list(islice(words, shard_size))
+
+    def build_all_lengths(self, word_lengths, n_workers=1, shard_size=DEFAULT_SHARD_SIZE):
+        if n_workers <= 1:
+            for word_length in word_lengths:
+                self.build_length(word_length, shard_size)
+            return
+
+        tasks = list()
+        for word_length in word_lengths:
+            if word_length not in self.words_dict_by_length or (word_length - 1) not in self.shorter_words_dict_by_length:
+                continue
+            length_words_number = len(self.words_dict_by_length[word_length])
+            for start in range(0, length_words_number, shard_size):
+                tasks.append((word_length, start, min(start + shard_size, length_words_number)))
+
+        # the words dict is handed to each worker once, at pool start-up, and not with every task.
+        # shards are stored in tasks order, so the index is the same for any number of workers.
+        with multiprocessing.Pool(n_workers, initializer=_init_shard_worker, initargs=(type(self), self.words_dict_by_length, self.letters_for_reductions, self.shorter_words_dict_by_length)) as pool:
+            # at most PENDING_SHARDS_PER_WORKER shards per worker are built and not stored yet
+            shards = imap_bounded(pool, _build_shard, tasks, n_workers * PENDING_SHARDS_PER_WORKER)
+            for word_length, length_shards in groupby(shards, key=itemgetter(0)):
+                self.store_length_shards(word_length, (shard for _, shard in length_shards))
+        # lengths without a previous length bucket, which have no deletions
+        for word_length in word_lengths:
+            self.build_length(word_length, shard_size)
+
+    def build_shard(self, words, word_length):
+        # (deletion positions, number of deletions of every word, reduction counts) of consecutive words of a bucket
+        shard_edges = self.build_shard_edges(words, word_length)
+        positions = list()
+        edges_numbers = list()
+        for word in words:
+            word_edges = shard_edges.get(word, ())
+            positions.extend(position for position, _, _ in word_edges)
+            edges_numbers.append(len(word_edges))
+        positions = np.array(positions, dtype=np.int16)
+        edges_numbers = np.array(edges_numbers, dtype=np.int64)
+        return positions, edges_numbers, self.count_compact_edges(words, word_length, positions, edges_numbers)
+
+    def store_length_shards(self, word_length, shards):
+        # the shards of a length come in the bucket order. the budget is checked before the offsets are allocated and
+        # before every shard is kept, so the kept arrays never exceed max_memory_bytes, besides them only the shards in flight are held
+        length_words_number = len(self.words_dict_by_length.get(word_length, ()))
+        offsets = None
+        memory_bytes = (length_words_number + 1) * np.dtype(np.int64).itemsize
+        if self.fits_memory(memory_bytes):
+            offsets = np.zeros(length_words_number + 1, dtype=np.int64)
+        positions_parts = list()
+        words_number = 0
+        reduction_counts = dict()
+        for positions, edges_numbers, shard_reduction_counts in shards:
+            for reduction_key, count in shard_reduction_counts.items():
+                reduction_counts[reduction_key] = reduction_counts.get(reduction_key, 0) + count
+            if offsets is None:
+                continue
+            memory_bytes += positions.nbytes
+            if not self.fits_memory(memory_bytes):
+                offsets = None
+                positions_parts = list()
+                continue
+            offsets[words_number + 1:words_number + 1 + len(edges_numbers)] = offsets[words_number] + np.cumsum(edges_numbers)
+            positions_parts.append(positions)
+            words_number += len(edges_numbers)
+        self.reduction_counts_by_length[word_length] = reduction_counts
+
+        if offsets is None:
+            get_logger().info(f"Deletions of word length {word_length} exceed the memory limit, not kept")
+            return
+        positions = np.concatenate(positions_parts) if len(positions_parts) > 0 else np.zeros(0, dtype=np.int16)
+        self.compact_edges_by_length[word_length] = (positions, offsets)
+        self.memory_bytes += memory_bytes
+
+    def fits_memory(self, memory_bytes):
+        return self.max_memory_bytes is None or self.memory_bytes + memory_bytes <= self.max_memory_bytes
+
+    def count_compact_edges(self, words, word_length, positions, edges_numbers):
+        reduction_counts = dict()
+        positions = positions.tolist()
+        start = 0
+        for word, edges_number in zip(words, edges_numbers.tolist()):
+            for position in positions[start:start + edges_number]:
+                reduction_key = f"{position}:{word[position]}"
+                reduction_counts[reduction_key] = reduction_counts.get(reduction_key, 0) + 1
+            start += edges_number
+        return reduction_counts
+
+    def build_shard_edges(self, words, word_length):
+        if (word_length - 1) not in self.shorter_words_dict_by_length:
+            return dict()
+        return self.build_words_edges(words, word_length)
+
+    def build_words_edges(self, words, word_length):
+        previous_length_words = self.shorter_words_dict_by_length[word_length - 1]
+        positions = self.get_position_range_including_negative_indexes(word_length)
+        length_edges = dict()
+        for word in words:
+            word_edges = list()
+            for position in positions:
+                letter = word[position]
+                if self.letters_for_reductions is None or letter in self.letters_for_reductions:
+                    permutation = get_permutation(word, position, word_length)
+                    if permutation in previous_length_words:
+                        word_edges.append((position, letter, permutation))
+            # words without any valid deletion are not stored, to keep the index small
+            if len(word_edges) > 0:
+                length_edges[word] = tuple(word_edges)
+        return length_edges
+
+    @staticmethod
+    def get_position_range_including_negative_indexes(word_length):
+        half_length = word_length // 2
+        return range(-half_length, half_length + word_length % 2)
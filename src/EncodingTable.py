@@ -0,0 +1,70 @@
+import os
+import mmap
+
+import numpy as np
+
+from src.CompactWordsDict import CompactWordsDict
+
+
+class EncodingTable:
+    """
+    Read-only {word: encoded word} table on disk, opened memory-mapped.
+    The words are a CompactWordsDict whose values are indexes into the encoded words, which are concatenated
+    into one UTF-8 blob with an offsets array, so a lookup is a binary search and one slice, without loading the table.
+    """
+
+    WORDS_DIR = 'words'
+    ENCODED_WORDS_FILE = 'encoded_words.bin'
+    ENCODED_OFFSETS_FILE = 'encoded_offsets.npy'
+
+    def __init__(self, path):
+        self.path = path
+        self.words = CompactWordsDict(os.path.join(path, self.WORDS_DIR))
+        self.encoded_offsets = np.load(os.path.join(path, self.ENCODED_OFFSETS_FILE), mmap_mode='r')
+        self.encoded_offsets_view = memoryview(self.encoded_offsets).cast('B').cast('q')
+        self.encoded_words_file = open(os.path.join(path, self.ENCODED_WORDS_FILE), 'rb')
+        if os.path.getsize(self.encoded_words_file.name) > 0:
+            self.encoded_words_blob = mmap.mmap(self.encoded_words_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # an empty file can't be memory-mapped
+            self.encoded_words_blob = b''
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def get(self, word, default=None):
+        index = self.words.get(word)
+        if index is None:
+            return default
+        return self.get_encoded_word(index)
+
+    def get_encoded_word(self, index):
+        offsets = self.encoded_offsets_view
+        return self.encoded_words_blob[offsets[index]:offsets[index + 1]].decode('utf-8')
+
+    def items(self):
+        for word, index in self.words.items():
+            yield word, self.get_encoded_word(index)
+
+    def close(self):
+        self.words.close()
+        if isinstance(self.encoded_words_blob, mmap.mmap):
+            self.encoded_words_blob.close()
+        self.encoded_words_file.close()
+
+    @staticmethod
+    def save(encoded_words, path):
+        words = list(encoded_words.keys())
+        encoded_bytes = [encoded_words[word].encode('utf-8') for word in words]
+        encoded_offsets = np.zeros(len(encoded_bytes) + 1, dtype=np.int64)
+        encoded_offsets[1:] = np.cumsum(np.array([len(encoded_word) for encoded_word in encoded_bytes], dtype=np.int64))
+
+        # written into a staging directory of the artifacts cache, which publishes it atomically
+        os.makedirs(path, exist_ok=True)
+        CompactWordsDict.save({word: index for index, word in enumerate(words)}, os.path.join(path, EncodingTable.WORDS_DIR))
+        with open(os.path.join(path, EncodingTable.ENCODED_WORDS_FILE), 'wb') as file:
+            file.write(b''.join(encoded_bytes))
+        np.save(os.path.join(path, EncodingTable.ENCODED_OFFSETS_FILE), encoded_offsets)
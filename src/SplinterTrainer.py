@@ -1,45 +1,90 @@
 import json
 import os
+from collections import ChainMap
 
 import numpy as np
 from datasets import load_dataset
+from scipy.stats import spearmanr
 
+from src.ArtifactsCache import ArtifactsCache
+from src.CompactWordsDict import CompactWordsDict
 from src.CorpusWordsExtractor import CorpusWordsExtractor
+from src.DeletionNeighboursIndex import DeletionNeighboursIndex
+from src.SplinterTrainingState import SplinterTrainingState
+from src.VectorizedDeletionNeighboursIndex import VectorizedDeletionNeighboursIndex
 from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 from src.logger import get_logger
-from src.utils.path_utils import get_logs_dir, get_raw_data_dir, get_splinter_dir, get_words_dict_dir
-from src.utils.utils import get_words_dict_by_length, get_permutation, get_corpus_name
+from src.utils.path_utils import get_logs_dir, get_raw_data_dir, get_splinter_dir
+from src.utils.utils import get_words_dict_by_length, get_permutation, get_corpus_name, get_local_files_fingerprint, \
+    get_hub_dataset_revision
 
 
 class SplinterTrainer:
-    def __init__(self, language_utils: LanguageUtilsInterface):
+    # part of the cache key of the trained reductions maps - bump it when the training algorithm changes its results
+    VERSION = 1
+    MIN_WORD_FREQUENCY = 10
+    RESULT_FILE_NAMES = ["reductions_map", "new_unicode_chars", "new_unicode_chars_inverted"]
+    WORDS_DICT_DIR_NAME = 'words_dict'
+
+    def __init__(self, language_utils: LanguageUtilsInterface, artifacts_cache: ArtifactsCache = None):
         self.language_utils = language_utils
+        self.artifacts_cache = artifacts_cache if artifacts_cache is not None else ArtifactsCache()
+        # words dropped by each filter of the last filter_words call
+        self.filter_drop_counts = None
+
+    def train(self, dataset_path: str, dataset_name: str, letters_for_reductions: [str] = None, n_workers: int = 1,
+              save_training_state: bool = False, vectorized: bool = False, edges_memory_limit_bytes: int = None,
+              sample_token_mass: float = None, validate_vectorized: bool = False):
+        """
+        sample_token_mass: if set (e.g. 0.9), the reductions are mined only from the most frequent words of every length
+        covering this share of the length's token mass. The maps are approximate, and compared with the full run if it's cached.
+        validate_vectorized: debug check that the vectorized index finds the same deletions as the pure Python one.
+        """
+        if sample_token_mass is not None and save_training_state:
+            raise ValueError("A sampled training can't be saved as a training state")
+        corpus_name = get_corpus_name(dataset_path, dataset_name)
+        words_dict_key = self.get_words_dict_key(dataset_path, dataset_name)
+        splinter_key = self.get_splinter_key(words_dict_key, letters_for_reductions, sample_token_mass)
+        # the training state isn't cached, so a run that should save it always trains
+        cached_splinter_path = None if save_training_state else self.artifacts_cache.get(splinter_key, f'{corpus_name} reductions maps')
+        if cached_splinter_path is not None:
+            return self.load_cached_results(cached_splinter_path)
 
-    def train(self, dataset_path: str, dataset_name: str, letters_for_reductions: [str] = None):
-        words_dict = self.get_word_dict(dataset_path, dataset_name)
-        pre_process_words_dict = self.pre_process_words(words_dict)
+        words_dict = self.get_word_dict(dataset_path, dataset_name, n_workers)
+        pre_process_words_dict = self.filter_words(words_dict)
+        max_counter = max(pre_process_words_dict.values())
+        trained_counts = dict(pre_process_words_dict) if save_training_state else None
+        self.normalize_words_counts(pre_process_words_dict, max_counter, in_place=True)
         words_dict_by_length = get_words_dict_by_length(pre_process_words_dict)
+        # when sampling, only the sampled words are reduced, but into any shorter word
+        mined_words_dict_by_length = words_dict_by_length
+        if sample_token_mass is not None:
+            mined_words_dict_by_length = self.sample_words_by_token_mass(words_dict_by_length, sample_token_mass)
         max_length = sorted(words_dict_by_length.keys(), reverse=True)[0]
     
         get_logger().info(f"Start first iteration of reductions:")
         reductions = self.initialize_reductions_dict(max_length)
+        first_iteration_counts = dict()
+        neighbours_index_class = VectorizedDeletionNeighboursIndex if vectorized else DeletionNeighboursIndex
+        neighbours_index = neighbours_index_class(mined_words_dict_by_length, letters_for_reductions, edges_memory_limit_bytes,
+                                                  shorter_words_dict_by_length=words_dict_by_length)
+        # the deletions of each length bucket are independent, so they can be mined by a pool of workers.
+        # the update pass stays sequential, since every length reads the updated scores of the previous one.
+        neighbours_index.build_all_lengths(range(4, max_length + 1), n_workers)
+        if vectorized and validate_vectorized:
+            neighbours_index.validate(range(4, max_length + 1))
+            get_logger().info("The vectorized deletions are the same as the pure Python ones")
         for word_length in range(4, max_length + 1):
             # PREVIOUS ONE: current_length_words = words_dict_by_length[word_length].keys()
             # CHANGE: Check if word_length and word_length - 1 exist to prevent KeyError
             if word_length not in words_dict_by_length or (word_length - 1) not in words_dict_by_length:
                 continue
 
-            current_length_words = words_dict_by_length[word_length].keys()
-            previous_length_words = words_dict_by_length[word_length - 1].keys()
-            for word in current_length_words:
-                for position in self.get_position_range_including_negative_indexes(word):
-                    if letters_for_reductions is None or word[position] in letters_for_reductions:
-                        permutation = get_permutation(word, position, word_length)
-                        if permutation in previous_length_words:
-                            reduction_key = f"{position}:{word[position]}"
-                            self.increment_value(reductions[word_length], reduction_key)
-    
-            reductions[word_length] = self.normalize_values(self.sort_dictionary(reductions[word_length]))
+            # the valid deletions of every word are computed once here, and reused by the second pass
+            reductions[word_length] = neighbours_index.count_length_reductions(word_length)
+    
+            first_iteration_counts[word_length] = self.sort_dictionary(reductions[word_length])
+            reductions[word_length] = self.normalize_values(first_iteration_counts[word_length])
             get_logger().info(f"Finished reductions for word length {word_length}")
     
         with open(f'{get_logs_dir()}/reductions_map_first_iteration.json', 'w') as file:
@@ -47,6 +92,9 @@ class SplinterTrainer:
     
         get_logger().info(f"Start updating reductions:")
         updated_reductions = self.initialize_reductions_dict(max_length)
+        updated_counts = dict()
+        # the reduction chosen for every reduced word, kept for the training state
+        words_reductions = dict()
         for word_length in range(4, max_length + 1):
             # PREVIOUS ONE: previous_length_words = words_dict_by_length[word_length - 1]
             # CHANGE: Check if word_length and word_length - 1 exist to prevent KeyError
@@ -55,14 +103,18 @@ class SplinterTrainer:
 
             previous_length_words = words_dict_by_length[word_length - 1]
             current_length_words = words_dict_by_length[word_length]
-            for word, score in list(current_length_words.items()):
-                reduction_with_score = self.get_reduction(word, reductions, previous_length_words, 3)
+            reductions_table = self.compile_reductions_table(reductions[word_length])
+            for word, word_edges in neighbours_index.get_length_words_edges(word_length):
+                reduction_with_score = self.get_reduction_from_edges(word_edges, reductions_table, previous_length_words, 3)
                 if reduction_with_score is not None:
                     self.increment_value(updated_reductions[word_length], reduction_with_score['reduction'])
-                    current_length_words[word] = score * reduction_with_score['score']
+                    current_length_words[word] *= reduction_with_score['score']
+                    if save_training_state:
+                        words_reductions[word] = reduction_with_score['reduction']
     
             # sort by frequency
-            updated_reductions[word_length] = self.normalize_values(self.sort_dictionary(updated_reductions[word_length]))
+            updated_counts[word_length] = self.sort_dictionary(updated_reductions[word_length])
+            updated_reductions[word_length] = self.normalize_values(updated_counts[word_length])
             # remove word lengths that doesn't have possible reductions
             if len(updated_reductions[word_length]) == 0:
                 del updated_reductions[word_length]
@@ -76,8 +128,242 @@ class SplinterTrainer:
         self.save_result_file("new_unicode_chars", reduction_to_new_chars_map)
         new_chars_to_reductions_map = {value: key for key, value in reduction_to_new_chars_map.items()}
         self.save_result_file("new_unicode_chars_inverted", new_chars_to_reductions_map)
+        results = (updated_reductions, reduction_to_new_chars_map, new_chars_to_reductions_map)
+        self.cache_results(splinter_key, results, f'{corpus_name} reductions maps')
+        if sample_token_mass is not None:
+            self.report_sample_comparison(updated_reductions, self.get_splinter_key(words_dict_key, letters_for_reductions), corpus_name)
+
+        if save_training_state:
+            # the words dict by length holds the final words scores, after the updating pass
+            words_scores = {word: score for length_words in words_dict_by_length.values() for word, score in length_words.items()}
+            training_state = SplinterTrainingState(
+                first_iteration_counts=first_iteration_counts,
+                updated_counts=updated_counts,
+                max_counter=max_counter,
+                insertion_contexts=self.get_insertion_contexts(words_scores.keys()),
+                letters_for_reductions=letters_for_reductions,
+                new_unicode_chars_map=reduction_to_new_chars_map,
+                words_counts=dict(words_dict.items()),
+                words_scores=words_scores,
+                trained_counts=trained_counts,
+                words_reductions={word: ord(reduction_to_new_chars_map[reduction]) for word, reduction in words_reductions.items()},
+            )
+            training_state.save(self.get_training_state_path())
+        return results
+
+    def train_incremental(self, previous_training_state_path: str, delta_words_dict, training_state_path: str = None):
+        """
+        Updates a previous training with the word counts of new text, so the maps are those of a full retrain on the
+        old and the new text, while only the lengths and the words the delta touches are computed again:
+        the first iteration counts are updated with the deletions of the newly trained words and into them, then the updating
+        pass reduces again all the words of the lengths whose first iteration counts changed, and in the other lengths only
+        the words whose count changed or whose shorter words changed their score.
+        If the delta raises the max word count, which normalizes all the scores, all the trained words are reduced again.
+        Reductions that already have a PUA char keep it, so corpora encoded with the previous maps stay valid.
+        """
+        state = SplinterTrainingState.load(previous_training_state_path)
+        letters_for_reductions = state.letters_for_reductions
+        words_counts, trained_counts = self.get_delta_counts(delta_words_dict, state)
+        new_words = {word: count for word, count in trained_counts.items() if word not in state.trained_counts}
+        max_counter = max(state.max_counter, max(trained_counts.values(), default=0))
+        get_logger().info(f"Incremental training: {len(delta_words_dict)} words in delta, {len(trained_counts)} changed trained words, "
+                          f"{len(new_words)} of them new")
+        all_trained_counts = ChainMap(trained_counts, state.trained_counts)
+
+        # every change of a length first iteration counts changes the scores of all its reductions
+        first_iteration_counts = state.first_iteration_counts
+        changed_lengths = set()
+        neighbour_lengths_words = self.get_trained_words_by_length(state, new_words, {len(word) + offset for word in new_words for offset in (-1, 1)})
+        for word in new_words:
+            word_length = len(word)
+            # reductions are mined only from words of 4 letters or more
+            if word_length >= 4:
+                for position, letter, _ in self.get_word_edges(word, neighbour_lengths_words[word_length - 1], letters_for_reductions):
+                    self.increment_value(first_iteration_counts.setdefault(word_length, dict()), f"{position}:{letter}")
+                    changed_lengths.add(word_length)
+            # previously trained words that can now be reduced into the new word
+            if word_length + 1 >= 4:
+                for position, letter, longer_word in self.get_insertion_edges(word, neighbour_lengths_words[word_length + 1], state.insertion_contexts,
+                                                                              letters_for_reductions):
+                    if longer_word not in new_words:
+                        self.increment_value(first_iteration_counts.setdefault(word_length + 1, dict()), f"{position}:{letter}")
+                        changed_lengths.add(word_length + 1)
+
+        trained_lengths = set(state.trained_counts.get_lengths()) | {len(word) for word in new_words}
+        max_length = max(trained_lengths, default=0)
+        # like in train(), a length is reduced only when it has words and so does the previous one
+        reduced_lengths = {word_length for word_length in trained_lengths if word_length >= 4 and word_length - 1 in trained_lengths}
+        is_rescoring_all = max_counter != state.max_counter
+        if is_rescoring_all:
+            get_logger().info(f"The max word count changed from {state.max_counter} to {max_counter}, all the words are reduced again")
+        previous_reductions = {ord(new_char): reduction for reduction, new_char in state.new_unicode_chars_map.items()}
+        changed_trained_counts_by_length = get_words_dict_by_length(trained_counts)
+        updated_counts = state.updated_counts
+        # the trained words whose score or reduction changed
+        words_scores = dict()
+        words_reductions = dict()
+        # shorter words first, every length reads the scores of the previous one
+        previous_length_changed_scores = dict()
+        for word_length in range(1, max_length + 1):
+            changed_length_counts = changed_trained_counts_by_length.get(word_length, dict())
+            if is_rescoring_all or word_length in changed_lengths:
+                # the whole length bucket is read once into dicts
+                length_counts = dict(state.trained_counts.get_length_items(word_length))
+                length_counts.update(changed_length_counts)
+                length_words = length_counts.keys()
+                length_scores = dict(state.words_scores.get_length_items(word_length))
+                length_reductions = dict(state.words_reductions.get_length_items(word_length))
+                previous_length_scores = dict(state.words_scores.get_length_items(word_length - 1))
+                previous_length_scores.update(previous_length_changed_scores)
+            else:
+                length_words = set(changed_length_counts.keys())
+                for changed_word in previous_length_changed_scores:
+                    length_words.update(longer_word for _, _, longer_word
+                                        in self.get_insertion_edges(changed_word, all_trained_counts, state.insertion_contexts, letters_for_reductions))
+                length_counts = all_trained_counts
+                length_scores = state.words_scores
+                length_reductions = state.words_reductions
+                previous_length_scores = ChainMap(previous_length_changed_scores, state.words_scores)
+            if word_length in reduced_lengths:
+                first_iteration_counts[word_length] = self.sort_dictionary(first_iteration_counts.get(word_length, dict()))
+                reductions_table = self.compile_reductions_table(self.normalize_values(first_iteration_counts[word_length]))
+
+            length_changed_scores = dict()
+            for word in length_words:
+                score = length_counts[word] / max_counter
+                reduction = None
+                if word_length in reduced_lengths:
+                    word_edges = self.get_word_edges(word, previous_length_scores, letters_for_reductions)
+                    reduction_with_score = self.get_reduction_from_edges(word_edges, reductions_table, previous_length_scores, 3)
+                    if reduction_with_score is not None:
+                        reduction = reduction_with_score['reduction']
+                        score *= reduction_with_score['score']
+                previous_reduction = previous_reductions.get(length_reductions.get(word, 0))
+                if reduction != previous_reduction:
+                    if previous_reduction is not None:
+                        self.decrement_value(updated_counts[word_length], previous_reduction)
+                    if reduction is not None:
+                        self.increment_value(updated_counts.setdefault(word_length, dict()), reduction)
+                    words_reductions[word] = reduction
+                if score != length_scores.get(word):
+                    length_changed_scores[word] = score
+            get_logger().info(f"Length {word_length}: {len(length_words)} words reduced again, {len(length_changed_scores)} changed their score")
+            words_scores.update(length_changed_scores)
+            previous_length_changed_scores = length_changed_scores
+
+        # the lengths that aren't reduced stay empty, and the reduced lengths without reductions are removed, as in train()
+        updated_reductions = self.initialize_reductions_dict(max_length)
+        for word_length in sorted(reduced_lengths):
+            updated_counts[word_length] = self.sort_dictionary(updated_counts.get(word_length, dict()))
+            updated_reductions[word_length] = self.normalize_values(updated_counts[word_length])
+            if len(updated_reductions[word_length]) == 0:
+                del updated_reductions[word_length]
+
+        self.save_result_file("reductions_map", updated_reductions)
+        reduction_to_new_chars_map = self.map_reductions_to_new_chars(updated_reductions, state.new_unicode_chars_map)
+        self.save_result_file("new_unicode_chars", reduction_to_new_chars_map)
+        new_chars_to_reductions_map = {value: key for key, value in reduction_to_new_chars_map.items()}
+        self.save_result_file("new_unicode_chars_inverted", new_chars_to_reductions_map)
+
+        training_state = SplinterTrainingState(
+            first_iteration_counts=first_iteration_counts,
+            updated_counts=updated_counts,
+            max_counter=max_counter,
+            insertion_contexts=self.get_insertion_contexts(new_words.keys(), state.insertion_contexts),
+            letters_for_reductions=letters_for_reductions,
+            new_unicode_chars_map=reduction_to_new_chars_map,
+            words_counts=state.words_counts,
+            words_scores=state.words_scores,
+            trained_counts=state.trained_counts,
+            words_reductions=state.words_reductions,
+        )
+        # only the changed words are written over the previous words dicts
+        training_state.save(training_state_path if training_state_path is not None else self.get_training_state_path(), {
+            SplinterTrainingState.WORDS_COUNTS_DIR: words_counts,
+            SplinterTrainingState.WORDS_SCORES_DIR: words_scores,
+            SplinterTrainingState.TRAINED_COUNTS_DIR: trained_counts,
+            SplinterTrainingState.WORDS_REDUCTIONS_DIR: {word: ord(reduction_to_new_chars_map[reduction]) if reduction is not None else 0
+                                                         for word, reduction in words_reductions.items()},
+        })
         return updated_reductions, reduction_to_new_chars_map, new_chars_to_reductions_map
 
+    @staticmethod
+    def get_trained_words_by_length(state, new_words, word_lengths):
+        # the previous and the new trained words of the given lengths, read once by length bucket instead of a lookup per word
+        trained_words_by_length = {word_length: set(word for word, _ in state.trained_counts.get_length_items(word_length))
+                                   for word_length in word_lengths}
+        for word in new_words:
+            if len(word) in trained_words_by_length:
+                trained_words_by_length[len(word)].add(word)
+        return trained_words_by_length
+
+    def get_delta_counts(self, delta_words_dict, state):
+        """
+        (raw counts, trained counts) of the words the delta changes: the raw words of the delta, and the words the
+        pre-processing filters keep from them, with their counts merged as filter_words merges them.
+        """
+        words_counts = dict()
+        trained_counts = dict()
+        for word, count in delta_words_dict.items():
+            previous_count = state.words_counts.get(word, 0)
+            words_counts[word] = previous_count + int(count)
+            if words_counts[word] < self.MIN_WORD_FREQUENCY:
+                continue
+            trained_word = self.language_utils.replace_final_letters(word)
+            if len(trained_word) <= 1 or self.language_utils.is_word_contains_letters_from_other_languages(trained_word):
+                continue
+            previous_trained_count = previous_count if previous_count >= self.MIN_WORD_FREQUENCY else 0
+            trained_counts[trained_word] = (trained_counts.get(trained_word, state.trained_counts.get(trained_word, 0))
+                                            + words_counts[word] - previous_trained_count)
+        return words_counts, trained_counts
+
+    def get_word_edges(self, word, words, letters_for_reductions):
+        # the valid deletions of the word, words can hold words of any length
+        word_length = len(word)
+        word_edges = list()
+        for position in self.get_position_range_including_negative_indexes(word):
+            letter = word[position]
+            if letters_for_reductions is None or letter in letters_for_reductions:
+                permutation = get_permutation(word, position, word_length)
+                if len(permutation) == word_length - 1 and permutation in words:
+                    word_edges.append((position, letter, permutation))
+        return word_edges
+
+    @staticmethod
+    def get_insertion_edges(word, words, insertion_contexts, letters_for_reductions):
+        # (position, letter, longer word) of every word of words that is the given word with one more letter.
+        # only the letters seen between the same two neighbours in a trained word are tried.
+        longer_word_length = len(word) + 1
+        half_length = longer_word_length // 2 + longer_word_length % 2
+        for index in range(longer_word_length):
+            # the reduction position of the inserted letter, as in get_position_range_including_negative_indexes
+            position = index if index < half_length else index - longer_word_length
+            left_letter = word[index - 1] if index > 0 else ''
+            right_letter = word[index] if index < len(word) else ''
+            for letter in insertion_contexts.get((left_letter, right_letter), ()):
+                if letters_for_reductions is not None and letter not in letters_for_reductions:
+                    continue
+                longer_word = word[:index] + letter + word[index:]
+                if longer_word in words:
+                    # the same check as the full training, which reduces with get_permutation
+                    if get_permutation(longer_word, position, longer_word_length) == word:
+                        yield position, letter, longer_word
+
+    @staticmethod
+    def get_insertion_contexts(words, insertion_contexts=None):
+        # (left letter, right letter) -> the letters found between them in the words. '' is the word boundary.
+        insertion_contexts = insertion_contexts if insertion_contexts is not None else dict()
+        for word in words:
+            for index, letter in enumerate(word):
+                left_letter = word[index - 1] if index > 0 else ''
+                right_letter = word[index + 1] if index + 1 < len(word) else ''
+                insertion_contexts.setdefault((left_letter, right_letter), set()).add(letter)
+        return insertion_contexts
+
+    @staticmethod
+    def get_training_state_path():
+        return f'{get_splinter_dir()}/training_state'
+
     """def get_word_dict(self, dataset_path, dataset_name):
         corpus_name = get_corpus_name(dataset_path, dataset_name)
         if not os.path.exists(f'{get_words_dict_dir()}/{corpus_name}.json'):
@@ -95,44 +381,198 @@ class SplinterTrainer:
         with open(f'{get_words_dict_dir()}/{corpus_name}.json', 'r', encoding='utf-8') as file:
             words_dict = json.load(file)
         return words_dict  """  
-    def get_word_dict(self, dataset_path, dataset_name):
+    def get_word_dict(self, dataset_path, dataset_name, n_workers=1):
         corpus_name = get_corpus_name(dataset_path, dataset_name)
-        output_filename = f'{get_words_dict_dir()}/{corpus_name}.json'  # Full path
-    
-        if not os.path.exists(output_filename):
+        words_dict_key = self.get_words_dict_key(dataset_path, dataset_name)
+        cached_words_dict_path = self.artifacts_cache.get(words_dict_key, f'{corpus_name} word dict')
+
+        if cached_words_dict_path is None:
             get_logger().info(f'word dict file was not found - creating it from corpus')
-        
+            # the Hub dataset is loaded at the commit of the cache key
+            revision_kwargs = dict()
+            revision = get_hub_dataset_revision(dataset_path, dataset_name)
+            if revision is not None:
+                revision_kwargs['revision'] = revision
+
             if "amanuelbyte" in dataset_path:
-               corpus = load_dataset(dataset_path, split="train", streaming=True)
+               corpus = load_dataset(dataset_path, split="train", streaming=True, **revision_kwargs)
             else:
-                 corpus = load_dataset(dataset_path, dataset_name, split="train", cache_dir=get_raw_data_dir())
+                 corpus = load_dataset(dataset_path, dataset_name, split="train", cache_dir=get_raw_data_dir(), **revision_kwargs)
         
             corpus_word_extractor = CorpusWordsExtractor(self.language_utils)
-        
-            # Pass the full file path, not just the name
-            corpus_word_extractor.convert_corpus_to_words_dict_file(corpus, output_filename)
 
-        with open(output_filename, 'r', encoding='utf-8') as file:
-            words_dict = json.load(file)
-        return words_dict    
+            # the JSON file and its checkpoints are kept in the staging dir, so an interrupted run resumes from them
+            staging_path = self.artifacts_cache.get_staging_path(words_dict_key)
+            json_filename = f'{staging_path}/{corpus_name}.json'
+            words_dict = corpus_word_extractor.convert_corpus_to_words_dict_file(corpus, json_filename, n_workers)
+            CompactWordsDict.save(words_dict, f'{staging_path}/{self.WORDS_DICT_DIR_NAME}')
+            os.remove(json_filename)
+            cached_words_dict_path = self.artifacts_cache.publish(words_dict_key, f'{corpus_name} word dict')
 
-    def pre_process_words(self, word_counters):
-        # Remove words that appeared less than 10 times in the entire corpus
-        words = {k: int(v) for k, v in word_counters.items() if int(v) >= 10}
+        # the compact word dict is memory-mapped, instead of parsing a whole JSON file
+        return CompactWordsDict(f'{cached_words_dict_path}/{self.WORDS_DICT_DIR_NAME}')
 
-        words = {self.language_utils.replace_final_letters(k): v for k, v in words.items()}
+    def get_words_dict_key(self, dataset_path, dataset_name):
+        language_utils_class = self.language_utils.__class__
+        key_parts = dict(
+            artifact='words_dict',
+            dataset_path=dataset_path,
+            dataset_name=dataset_name,
+            local_files_fingerprint=get_local_files_fingerprint(dataset_path, dataset_name),
+            language_utils=f'{language_utils_class.__module__}.{language_utils_class.__qualname__}',
+            language_utils_version=language_utils_class.VERSION,
+        )
+        # a Hub dataset changes without any local file changing, so its commit is part of the key.
+        # only added when it's known, so the keys of the local corpora stay the same
+        dataset_revision = get_hub_dataset_revision(dataset_path, dataset_name)
+        if dataset_revision is not None:
+            key_parts['dataset_revision'] = dataset_revision
+        return ArtifactsCache.get_key(**key_parts)
 
-        # Remove empty words and single characters words
-        words = {k: int(v) for k, v in words.items() if len(k) > 1}
+    def get_splinter_key(self, words_dict_key, letters_for_reductions, sample_token_mass=None):
+        key_parts = dict(
+            artifact='splinter',
+            words_dict_key=words_dict_key,
+            letters_for_reductions=sorted(letters_for_reductions) if letters_for_reductions is not None else None,
+            trainer_version=self.VERSION,
+        )
+        # only added when sampling, so the keys of the full runs stay the same
+        if sample_token_mass is not None:
+            key_parts['sample_token_mass'] = sample_token_mass
+        return ArtifactsCache.get_key(**key_parts)
 
-        # remove words containing characters from other languages.
-        words = {k: v for k, v in words.items() if not self.language_utils.is_word_contains_letters_from_other_languages(k)}
+    def load_cached_results(self, cached_splinter_path):
+        results = dict()
+        for file_name in self.RESULT_FILE_NAMES:
+            with open(f'{cached_splinter_path}/{file_name}.json', 'r', encoding='utf-8') as file:
+                results[file_name] = json.load(file)
+            self.save_result_file(file_name, results[file_name])
+        # JSON keys are strings, the reductions map is keyed by word length
+        reductions_map = {int(word_length): reductions for word_length, reductions in results["reductions_map"].items()}
+        return reductions_map, results["new_unicode_chars"], results["new_unicode_chars_inverted"]
 
-        # normalize values
+    def cache_results(self, splinter_key, results, description):
+        staging_path = self.artifacts_cache.get_staging_path(splinter_key)
+        for file_name, data in zip(self.RESULT_FILE_NAMES, results):
+            with open(f'{staging_path}/{file_name}.json', 'w') as file:
+                json.dump(data, file, indent='\t')
+        self.artifacts_cache.publish(splinter_key, description)
+
+    @staticmethod
+    def sample_words_by_token_mass(words_dict_by_length, token_mass):
+        # the smallest set of most frequent words of every length that covers token_mass of its scores
+        sampled_words_dict_by_length = dict()
+        for word_length, length_words in words_dict_by_length.items():
+            scores = np.fromiter(length_words.values(), dtype=np.float64, count=len(length_words))
+            order = np.argsort(-scores, kind='stable')
+            cumulative_scores = np.cumsum(scores[order])
+            sample_size = min(int(np.searchsorted(cumulative_scores, token_mass * cumulative_scores[-1])) + 1, len(length_words))
+            is_sampled = np.zeros(len(length_words), dtype=bool)
+            is_sampled[order[:sample_size]] = True
+            # the words keep their order in the bucket
+            sampled_words_dict_by_length[word_length] = {word: score for (word, score), is_word_sampled
+                                                         in zip(length_words.items(), is_sampled.tolist()) if is_word_sampled}
+        sampled_words_number = sum(len(length_words) for length_words in sampled_words_dict_by_length.values())
+        words_number = sum(len(length_words) for length_words in words_dict_by_length.values())
+        get_logger().info(f"Sampled {sampled_words_number} of {words_number} words, covering {token_mass:.0%} of every length token mass")
+        return sampled_words_dict_by_length
+
+    def report_sample_comparison(self, sampled_reductions, full_splinter_key, corpus_name):
+        cached_splinter_path = self.artifacts_cache.get(full_splinter_key, f'{corpus_name} full reductions maps')
+        if cached_splinter_path is None:
+            get_logger().info("No full run of this corpus is cached, the sampled reductions map isn't compared")
+            return None
+        with open(f'{cached_splinter_path}/reductions_map.json', 'r', encoding='utf-8') as file:
+            full_reductions = {int(word_length): reductions for word_length, reductions in json.load(file).items()}
+        comparison = self.compare_reductions_maps(sampled_reductions, full_reductions)
+        for word_length, length_comparison in comparison.items():
+            get_logger().info(f"Sampled vs full reductions of word length {word_length}: {length_comparison}")
+        with open(f'{get_logs_dir()}/reductions_map_sample_comparison.json', 'w') as file:
+            json.dump(comparison, file, indent='\t')
+        return comparison
+
+    @staticmethod
+    def compare_reductions_maps(reductions, reference_reductions, top_k=10):
+        # per word length: overlap of the top k reductions, and Spearman correlation of the ranks of the common reductions
+        comparison = dict()
+        for word_length in sorted(set(reference_reductions.keys()) - {1}):
+            ranking = list(reductions.get(word_length, dict()).keys())
+            reference_ranking = list(reference_reductions[word_length].keys())
+            top_k_overlap = len(set(ranking[:top_k]) & set(reference_ranking[:top_k])) / max(min(top_k, len(reference_ranking)), 1)
+            common_reductions = set(ranking) & set(reference_ranking)
+            rank_correlation = None
+            if len(common_reductions) > 1:
+                reference_ranks_by_reduction = {reduction: rank for rank, reduction in enumerate(reference_ranking)}
+                ranks = [rank for rank, reduction in enumerate(ranking) if reduction in common_reductions]
+                reference_ranks = [reference_ranks_by_reduction[reduction] for reduction in ranking if reduction in common_reductions]
+                rank_correlation = float(spearmanr(ranks, reference_ranks).statistic)
+            comparison[word_length] = {
+                'top_k_overlap': top_k_overlap,
+                'rank_correlation': rank_correlation,
+                'reductions': len(ranking),
+                'reference_reductions': len(reference_ranking),
+            }
+        return comparison
+
+    def pre_process_words(self, word_counters):
+        words = self.filter_words(word_counters)
         max_counter = max(words.values())
-        words = {k: (v / max_counter) for k, v in words.items()}
+        return self.normalize_words_counts(words, max_counter, in_place=True)
+
+    def filter_words(self, word_counters):
+        """
+        Applies all the filters to every word in a single pass, without intermediate dicts.
+        word_counters can be a dict, a CompactWordsDict or an iterable of (word, count) pairs.
+        The number of words dropped by each filter is logged and kept in self.filter_drop_counts.
+        """
+        drop_counts = {'min_frequency': 0, 'merged_final_letters': 0, 'single_char': 0, 'other_languages': 0}
+        if isinstance(word_counters, CompactWordsDict):
+            # the rare words, most of the words dict, are skipped before being decoded
+            drop_counts['min_frequency'] = len(word_counters)
+            word_counts = word_counters.get_items_with_min_count(self.MIN_WORD_FREQUENCY)
+        elif hasattr(word_counters, 'items'):
+            word_counts = word_counters.items()
+        else:
+            word_counts = word_counters
+
+        words = dict()
+        kept_words_number = 0
+        for word, count in word_counts:
+            count = int(count)
+            # Remove words that appeared less than 10 times in the entire corpus
+            if count < self.MIN_WORD_FREQUENCY:
+                drop_counts['min_frequency'] += 1
+                continue
+            kept_words_number += 1
+            word = self.language_utils.replace_final_letters(word)
+            # Remove empty words and single characters words
+            if len(word) <= 1:
+                drop_counts['single_char'] += 1
+                continue
+            # remove words containing characters from other languages.
+            if self.language_utils.is_word_contains_letters_from_other_languages(word):
+                drop_counts['other_languages'] += 1
+                continue
+            # words that differ only by their final letters are merged, and their counts are summed,
+            # so the merged count doesn't depend on the order of the words dict
+            if word in words:
+                drop_counts['merged_final_letters'] += 1
+            words[word] = words.get(word, 0) + count
+
+        if isinstance(word_counters, CompactWordsDict):
+            drop_counts['min_frequency'] -= kept_words_number
+        self.filter_drop_counts = drop_counts
+        get_logger().info(f"Filtered words dict: kept {len(words)} words, dropped {drop_counts}")
         return words
 
+    @staticmethod
+    def normalize_words_counts(words, max_counter, in_place=False):
+        if in_place:
+            for k, v in words.items():
+                words[k] = v / max_counter
+            return words
+        return {k: (v / max_counter) for k, v in words.items()}
+
     def initialize_reductions_dict(self, max_length):
         # adding single chars to the map, so "root" letters will also be converted when encoding the text
         single_chars = self.language_utils.get_language_alphabet()
@@ -147,13 +587,23 @@ class SplinterTrainer:
             dictionary[key] += 1
         else:
             dictionary[key] = 1
+
+    def decrement_value(self, dictionary, key):
+        dictionary[key] -= 1
+        if dictionary[key] == 0:
+            del dictionary[key]
     
-    def map_reductions_to_new_chars(self, reductions):
+    def map_reductions_to_new_chars(self, reductions, previous_reduction_to_new_chars_map=None):
         reductions_set = set()
         for word_length, length_reductions in reductions.items():
             reductions_set.update(length_reductions.keys())
         reduction_to_new_chars_map = dict()
         unicode_pua_start = 0x5000
+        if previous_reduction_to_new_chars_map:
+            # reductions keep their previous chars, new reductions get the chars after the last used one
+            reduction_to_new_chars_map.update(previous_reduction_to_new_chars_map)
+            reductions_set -= previous_reduction_to_new_chars_map.keys()
+            unicode_pua_start = max(ord(new_char) for new_char in previous_reduction_to_new_chars_map.values()) + 1
         for i, reduction in enumerate(sorted(reductions_set)):
             new_char = chr(unicode_pua_start + i)
             reduction_to_new_chars_map[reduction] = new_char
@@ -171,33 +621,36 @@ class SplinterTrainer:
         return percent_dictionary
     
     def get_position_range_including_negative_indexes(self, word):
-        half_length = len(word) // 2
-        return range(-half_length, half_length + len(word) % 2)
+        return DeletionNeighboursIndex.get_position_range_including_negative_indexes(len(word))
     
-    def get_reduction(self, word, reductions, previous_length_words, max_number_of_candidates):
-        word_length = len(word)
+    @staticmethod
+    def compile_reductions_table(length_reductions):
+        # (position, letter) -> (rank, reduction, score), parsed once per word length instead of once per word
+        reductions_table = dict()
+        for rank, (reduction, score) in enumerate(length_reductions.items()):
+            position, letter = reduction.split(':')
+            reductions_table[(int(position), letter)] = (rank, reduction, score)
+        return reductions_table
+
+    def get_reduction_from_edges(self, word_edges, reductions_table, previous_length_words, max_number_of_candidates):
+        # the best of the first max_number_of_candidates valid deletions of the word, in the order of the reductions map
+        ranked_edges = list()
+        for position, letter, permutation in word_edges:
+            table_entry = reductions_table.get((position, letter))
+            if table_entry is not None:
+                ranked_edges.append(table_entry + (permutation,))
+        ranked_edges.sort()
+
         possible_reductions = list()
-        if word_length > 3:
-            # CHANGE: Check if word_length exists in reductions dictionary
-            if word_length not in reductions:
-                return None
-                
-            for reduction, reduction_score in reductions[word_length].items():
-                position, letter = reduction.split(':')
-                position = int(position)
-                if word[position] == letter:
-                    permutation = get_permutation(word, position, word_length)
-                    if permutation in previous_length_words:
-                        permutation_score = previous_length_words[permutation]
-                        possible_reductions.append({"reduction": reduction, "score": reduction_score * permutation_score})
-                        if len(possible_reductions) >= max_number_of_candidates:
-                            break
-    
+        for _, reduction, reduction_score, permutation in ranked_edges[:max_number_of_candidates]:
+            permutation_score = previous_length_words[permutation]
+            possible_reductions.append({"reduction": reduction, "score": reduction_score * permutation_score})
+
         max_score_reduction = None
         if len(possible_reductions) > 0:
             max_score_reduction = max(possible_reductions, key=lambda x: x["score"])
         return max_score_reduction
-    
+
     def save_result_file(self, file_name, data):
         if not os.path.exists(get_splinter_dir()):
             os.makedirs(get_splinter_dir())
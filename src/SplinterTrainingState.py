@@ -0,0 +1,91 @@
+import json
+import os
+
+from src.CompactWordsDict import CompactWordsDict
+
+
+class SplinterTrainingState:
+    """
+    What an incremental SplinterTrainer run needs from the previous run: the raw (not normalized) reduction counts
+    of both passes, the raw word counts, the count, final score and chosen reduction of every trained word,
+    and the reductions to PUA chars map.
+    """
+
+    REDUCTIONS_COUNTS_FILE = 'reductions_counts.json'
+    NEW_UNICODE_CHARS_FILE = 'new_unicode_chars.json'
+    WORDS_COUNTS_DIR = 'words_counts'
+    WORDS_SCORES_DIR = 'words_scores'
+    TRAINED_COUNTS_DIR = 'trained_counts'
+    WORDS_REDUCTIONS_DIR = 'words_reductions'
+
+    def __init__(self, first_iteration_counts, updated_counts, max_counter, insertion_contexts, letters_for_reductions,
+                 new_unicode_chars_map, words_counts, words_scores, trained_counts, words_reductions):
+        self.first_iteration_counts = first_iteration_counts
+        self.updated_counts = updated_counts
+        # the words scores are normalized by the max word count of the first run
+        self.max_counter = max_counter
+        # (left letter, right letter) -> the letters between them in the trained words
+        self.insertion_contexts = insertion_contexts
+        self.letters_for_reductions = letters_for_reductions
+        self.new_unicode_chars_map = new_unicode_chars_map
+        self.words_counts = words_counts
+        self.words_scores = words_scores
+        # the counts of the trained words, after the pre-processing filters merged them
+        self.trained_counts = trained_counts
+        # trained word -> code point of the PUA char of its reduction in the updating pass, 0 if it has none
+        self.words_reductions = words_reductions
+
+    def get_words_dicts(self):
+        return {
+            self.WORDS_COUNTS_DIR: self.words_counts,
+            self.WORDS_SCORES_DIR: self.words_scores,
+            self.TRAINED_COUNTS_DIR: self.trained_counts,
+            self.WORDS_REDUCTIONS_DIR: self.words_reductions,
+        }
+
+    def save(self, path, updated_words_dicts=None):
+        """
+        updated_words_dicts: dir name -> the changed words of the words dict, when the words dicts are the CompactWordsDicts
+        of a loaded state. They are saved with their changes, without decoding the words that didn't change.
+        """
+        os.makedirs(path, exist_ok=True)
+        reductions_counts = {
+            "first_iteration": self.first_iteration_counts,
+            "updated": self.updated_counts,
+            "max_counter": self.max_counter,
+            "insertion_contexts": [[left, right, ''.join(sorted(letters))] for (left, right), letters in self.insertion_contexts.items()],
+            "letters_for_reductions": self.letters_for_reductions,
+        }
+        with open(os.path.join(path, self.REDUCTIONS_COUNTS_FILE), 'w', encoding='utf-8') as file:
+            json.dump(reductions_counts, file, ensure_ascii=False, indent='\t')
+        with open(os.path.join(path, self.NEW_UNICODE_CHARS_FILE), 'w', encoding='utf-8') as file:
+            json.dump(self.new_unicode_chars_map, file, indent='\t')
+        for dir_name, words_dict in self.get_words_dicts().items():
+            if updated_words_dicts is not None:
+                CompactWordsDict.save_updated(words_dict, updated_words_dicts.get(dir_name, dict()), os.path.join(path, dir_name))
+            else:
+                CompactWordsDict.save(words_dict, os.path.join(path, dir_name))
+
+    @staticmethod
+    def load(path):
+        with open(os.path.join(path, SplinterTrainingState.REDUCTIONS_COUNTS_FILE), 'r', encoding='utf-8') as file:
+            reductions_counts = json.load(file)
+        with open(os.path.join(path, SplinterTrainingState.NEW_UNICODE_CHARS_FILE), 'r', encoding='utf-8') as file:
+            new_unicode_chars_map = json.load(file)
+        return SplinterTrainingState(
+            first_iteration_counts=SplinterTrainingState.get_int_keys(reductions_counts["first_iteration"]),
+            updated_counts=SplinterTrainingState.get_int_keys(reductions_counts["updated"]),
+            max_counter=reductions_counts["max_counter"],
+            insertion_contexts={(left, right): set(letters) for left, right, letters in reductions_counts["insertion_contexts"]},
+            letters_for_reductions=reductions_counts["letters_for_reductions"],
+            new_unicode_chars_map=new_unicode_chars_map,
+            words_counts=CompactWordsDict(os.path.join(path, SplinterTrainingState.WORDS_COUNTS_DIR)),
+            words_scores=CompactWordsDict(os.path.join(path, SplinterTrainingState.WORDS_SCORES_DIR)),
+            trained_counts=CompactWordsDict(os.path.join(path, SplinterTrainingState.TRAINED_COUNTS_DIR)),
+            words_reductions=CompactWordsDict(os.path.join(path, SplinterTrainingState.WORDS_REDUCTIONS_DIR)),
+        )
+
+    @staticmethod
+    def get_int_keys(counts_by_length):
+        # JSON keys are strings, the counts are keyed by word length
+        return {int(word_length): counts for word_length, counts in counts_by_length.items()}
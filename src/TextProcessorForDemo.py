@@ -7,8 +7,7 @@ from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 class TextProcessorForDemo(TextProcessorWithEncoding):
 
     def __init__(self, language_utils: LanguageUtilsInterface, reductions_map, new_unicode_chars_map, new_unicode_chars_inverted_map):
-        super().__init__(language_utils, reductions_map, new_unicode_chars_map)
-        self.new_unicode_chars_inverted_map = new_unicode_chars_inverted_map
+        super().__init__(language_utils, reductions_map, new_unicode_chars_map, new_unicode_chars_inverted_map)
 
     def process(self, text):
         if text is None:
@@ -25,14 +24,16 @@ class TextProcessorForDemo(TextProcessorWithEncoding):
             for word in words:
                 if len(word) == 0:
                     continue
-                word = self.language_utils.replace_final_letters(word)
+                normalized_word = self.language_utils.replace_final_letters(word)
                 # if a word contains letters from other languages, convert only the letters from our language.
-                if self.language_utils.is_word_contains_letters_from_other_languages(word):
-                    word_reductions = self.get_single_chars_reductions(word)
-                    encoded_word = self.get_reduction_for_word_with_letters_from_other_languages(word)
+                if self.language_utils.is_word_contains_letters_from_other_languages(normalized_word):
+                    word_reductions = self.get_single_chars_reductions(normalized_word)
+                    encoded_word = self.get_reduction_for_word_with_letters_from_other_languages(normalized_word)
                 else:
-                    word_reductions = self.get_word_reductions(word)
-                    encoded_word = ''.join([self.new_unicode_chars_map[reduction] for reduction in word_reductions])
+                    # the words cache and the persisted encoding table are keyed by the surface word, which encode_word normalizes.
+                    # the reductions follow from the new chars
+                    encoded_word = self.get_encoded_word(word)
+                    word_reductions = [self.new_unicode_chars_inverted_map.get(char, char) for char in encoded_word]
                 word_reductions_list.append(f'{word_reductions}')
                 encoded_words_list.append(encoded_word)
             reduced_sentence = " ".join(word_reductions_list)
@@ -1,7 +1,26 @@
+import multiprocessing
 from abc import ABC, abstractmethod
 
 from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 
+# at most this many articles are sent to a pool worker at once, and at least 4 chunks per worker when the batch is smaller
+PROCESSING_CHUNK_SIZE = 64
+PROCESSING_CHUNKS_PER_WORKER = 4
+
+# set once per pool worker by _init_processing_worker, so tasks only carry the texts
+_processing_worker_processor = None
+
+
+def _init_processing_worker(text_processor):
+    global _processing_worker_processor
+    _processing_worker_processor = text_processor
+    _processing_worker_processor.init_worker()
+
+
+def _process_texts_chunk(texts):
+    processed_texts = [_processing_worker_processor.process(text) for text in texts]
+    return processed_texts, _processing_worker_processor.pop_worker_updates()
+
 
 class TextProcessorInterface(ABC):
 
@@ -11,3 +30,57 @@ class TextProcessorInterface(ABC):
     @abstractmethod
     def process(self, text: str) -> str:
         pass
+
+    def process_batch(self, texts, n_workers: int = 1, pool=None) -> list:
+        """
+        Processes the texts in order, by a pool of n_workers processes if n_workers > 1.
+        A pool of n_workers from get_processing_pool() can be passed too, to initialise the workers once for many batches.
+        """
+        texts = list(texts)
+        if pool is None and n_workers <= 1:
+            return [self.process(text) for text in texts]
+        if pool is None:
+            with self.get_processing_pool(n_workers) as pool:
+                return self.process_batch(texts, n_workers, pool)
+
+        chunk_size = max(1, min(PROCESSING_CHUNK_SIZE, len(texts) // (max(n_workers, 1) * PROCESSING_CHUNKS_PER_WORKER)))
+        texts_chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        processed_texts = list()
+        # imap keeps the chunks order, so the output is the same as processing the texts one by one
+        for processed_chunk, worker_updates in pool.imap(_process_texts_chunk, texts_chunks):
+            processed_texts.extend(processed_chunk)
+            self.apply_worker_updates(worker_updates)
+        return processed_texts
+
+    def get_processing_pool(self, n_workers: int):
+        # every worker gets a copy of the processor once, at pool start-up
+        return multiprocessing.Pool(n_workers, initializer=_init_processing_worker, initargs=(self,))
+
+    def init_worker(self) -> None:
+        # called in every pool worker on its copy of the processor, before the first chunk
+        pass
+
+    def pop_worker_updates(self):
+        # state a pool worker hands back to the main processor with every chunk, e.g. newly encoded words and cache counters
+        return None
+
+    def apply_worker_updates(self, worker_updates) -> None:
+        pass
+
+    def get_cache_stats(self) -> dict:
+        # hits, misses and evictions of the processor's caches, by cache name
+        return dict()
+
+    def get_words(self, text: str):
+        # the words process() encodes one by one, for processors that can encode a corpus's distinct words up front
+        return iter(())
+
+    def pre_encode_words(self, words, n_workers: int = 1) -> None:
+        pass
+
+    def load_encoding_table(self, artifacts_cache=None) -> bool:
+        # persisted encodings of earlier runs, for processors whose encoding of a word is expensive
+        return False
+
+    def save_encoding_table(self, artifacts_cache=None) -> None:
+        pass
@@ -1,16 +1,117 @@
+import multiprocessing
 import re
+from src.ArtifactsCache import ArtifactsCache
+from src.EncodingTable import EncodingTable
+from src.LRUCache import LRUCache
+from src.logger import get_logger
 from src.TextProcessorInterface import TextProcessorInterface
 from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 from src.utils.utils import get_permutation
 
+DEFAULT_BEAM_CACHE_SIZE = 200000
+DEFAULT_WORD_CACHE_SIZE = 1000000
+# the cached reduction of a word can be None
+NOT_CACHED = object()
+PRE_ENCODING_CHUNK_SIZE = 10000
+# encoding mode -> (depth, width) of the reductions beam search. exact is the original encoding,
+# the others trade some segmentation quality for throughput (see benchmark_text_processor.benchmark_encoding_modes)
+ENCODING_MODES = {
+    'exact': (3, 3),
+    'balanced': (2, 2),
+    'greedy': (1, 1),
+}
+DEFAULT_ENCODING_MODE = 'exact'
+# the caches counters a pool worker hands back, to be added up in the main processor
+CACHE_COUNTER_NAMES = ('hits', 'misses', 'evictions')
+
+# set once per pool worker by _init_encoding_worker, so tasks only carry the words
+_encoding_worker_processor = None
+
+
+def _init_encoding_worker(text_processor):
+    global _encoding_worker_processor
+    _encoding_worker_processor = text_processor
+    _encoding_worker_processor.init_worker()
+
+
+def _encode_words_chunk(words):
+    return [_encoding_worker_processor.encode_word(word) for word in words], _encoding_worker_processor.pop_worker_updates()
+
+
 class TextProcessorWithEncoding(TextProcessorInterface):
+    # bump when the encoding of a word changes, so persisted encoding tables are not used
+    VERSION = 1
+    ENCODING_TABLE_DIR_NAME = 'encoding_table'
 
-    def __init__(self, language_utils: LanguageUtilsInterface, reductions_map, new_unicode_chars_map, new_unicode_chars_inverted_map):
+    def __init__(self, language_utils: LanguageUtilsInterface, reductions_map, new_unicode_chars_map, new_unicode_chars_inverted_map,
+                 beam_cache_size=DEFAULT_BEAM_CACHE_SIZE, word_cache_size=DEFAULT_WORD_CACHE_SIZE, word_cache=None,
+                 encoding_mode=DEFAULT_ENCODING_MODE):
         super().__init__(language_utils)
+        if encoding_mode not in ENCODING_MODES:
+            raise ValueError(f'unknown encoding mode {encoding_mode}, expected one of {list(ENCODING_MODES)}')
+        self.encoding_mode = encoding_mode
+        self.beam_depth, self.beam_width = ENCODING_MODES[encoding_mode]
         self.reductions_map = reductions_map
         self.new_unicode_chars_map = new_unicode_chars_map
         self.new_unicode_chars_inverted_map = new_unicode_chars_inverted_map
-        self.word_reductions_cache = dict()
+        # surface word -> encoded word. any object with get(key, default), put(key, value) and get_stats() can be plugged in
+        self.word_reductions_cache = word_cache if word_cache is not None else LRUCache(word_cache_size)
+        self.reductions_tables = {word_length: self.compile_reductions_table(length_reductions, new_unicode_chars_map)
+                                  for word_length, length_reductions in reductions_map.items()}
+        # reduction -> (position, new char) of the compiled entries, so the chosen reductions aren't parsed or mapped again
+        self.compiled_reductions = {reduction: (position, new_char)
+                                    for reductions_table in self.reductions_tables.values() for letters_entries in reductions_table.values()
+                                    for entries in letters_entries.values() for _, reduction, position, _, new_char in entries}
+        # (word, depth, width) -> best root reduction, and (word, width) -> expansions of a beam node
+        self.reductions_cache = LRUCache(beam_cache_size)
+        self.beam_expansions_cache = LRUCache(beam_cache_size)
+        # persisted {word: encoded word} of earlier runs with the same reductions map, and the words encoded since
+        self.encoding_table = None
+        self.new_encoded_words = None
+        self.encoding_table_hits = 0
+        # read-only {word: encoded word} of the corpus words encoded ahead by pre_encode_words
+        self.pre_encoded_words = None
+        # cache name -> counter -> the counts of the pool workers' caches, and in a worker the counts it already handed back
+        self.workers_cache_counts = dict()
+        self.popped_cache_counts = dict()
+
+    def __getstate__(self):
+        # pool workers open the memory-mapped table again by its path, and send back the words they encoded
+        state = self.__dict__.copy()
+        state['encoding_table'] = self.encoding_table.path if self.encoding_table is not None else None
+        state['new_encoded_words'] = dict() if self.new_encoded_words is not None else None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.encoding_table is not None:
+            self.encoding_table = EncodingTable(self.encoding_table)
+
+    def init_worker(self):
+        # a worker starts from the main processor's counters, only what it counts itself is handed back
+        self.workers_cache_counts = dict()
+        self.popped_cache_counts = self.get_cache_counts()
+
+    def pop_worker_updates(self):
+        # (the words encoded, the caches counts) since the last chunk of the worker
+        new_encoded_words = self.new_encoded_words
+        if new_encoded_words is not None:
+            self.new_encoded_words = dict()
+        cache_counts = self.get_cache_counts()
+        new_cache_counts = {cache_name: {counter: count - self.popped_cache_counts.get(cache_name, dict()).get(counter, 0)
+                                         for counter, count in counts.items()}
+                            for cache_name, counts in cache_counts.items()}
+        self.popped_cache_counts = cache_counts
+        return new_encoded_words, new_cache_counts
+
+    def apply_worker_updates(self, worker_updates):
+        new_encoded_words, new_cache_counts = worker_updates
+        if new_encoded_words and self.new_encoded_words is not None:
+            self.new_encoded_words.update(new_encoded_words)
+        for cache_name, counts in new_cache_counts.items():
+            workers_counts = self.workers_cache_counts.setdefault(cache_name, dict())
+            for counter, count in counts.items():
+                workers_counts[counter] = workers_counts.get(counter, 0) + count
 
     def process(self, text):
         if text is None:
@@ -22,30 +123,8 @@ class TextProcessorWithEncoding(TextProcessorInterface):
         
         for sentence in sentences:
             encoded_words_list = list()
-            """words = re.split(r'\s|-|,|:|"|\(|\)', sentence)"""
-            # This splits on whitespace AND common Ge'ez/Latin punctuation
-            words = re.split(r'[\s፡።፣፤፤፥፦፧፨\-,:;()\"\'?!]+', sentence)
-            words = [w for w in words if w] # Filter out empty strings
-
-            for word in words:
-                if not word:
-                    continue
-                
-                original_word = word
-                if original_word in self.word_reductions_cache:
-                    encoded_word = self.word_reductions_cache[original_word]
-                else:
-                    word = self.language_utils.replace_final_letters(word)
-                    if self.language_utils.is_word_contains_letters_from_other_languages(word):
-                        encoded_word = self.get_reduction_for_word_with_letters_from_other_languages(word)
-                    else:
-                        word_reductions = self.get_word_reductions(word)
-                        # Handle both splinter keys and raw characters safely using .get()
-                        encoded_chars = [self.new_unicode_chars_map.get(red, red) for red in word_reductions]
-                        encoded_word = ''.join(encoded_chars)
-                
-                encoded_words_list.append(encoded_word)
-                self.word_reductions_cache[original_word] = encoded_word
+            for word in self.split_sentence(sentence):
+                encoded_words_list.append(self.get_encoded_word(word))
             
             encoded_sentence = " ".join(encoded_words_list)
             if encoded_sentence:
@@ -53,6 +132,129 @@ class TextProcessorWithEncoding(TextProcessorInterface):
                 
         return "\n".join(encoded_sentences_list)
 
+    @staticmethod
+    def split_sentence(sentence):
+        # This splits on whitespace AND common Ge'ez/Latin punctuation
+        words = re.split(r'[\s፡።፣፤፤፥፦፧፨\-,:;()\"\'?!]+', sentence)
+        return [w for w in words if w] # Filter out empty strings
+
+    def get_words(self, text):
+        # the surface words of the text, split as process() splits them
+        if text is None:
+            return
+        for sentence in re.split(r'[.\n]', self.language_utils.remove_diacritics(text)):
+            yield from self.split_sentence(sentence)
+
+    def get_encoded_word(self, word):
+        # pre-encoded words, then the words cache, then the persisted encoding table, and only then the beam search
+        if self.pre_encoded_words is not None:
+            encoded_word = self.pre_encoded_words.get(word)
+            if encoded_word is not None:
+                return encoded_word
+        encoded_word = self.word_reductions_cache.get(word)
+        if encoded_word is None:
+            encoded_word = self.get_persisted_encoded_word(word)
+            if encoded_word is None:
+                encoded_word = self.encode_word(word)
+                self.add_new_encoded_word(word, encoded_word)
+            self.word_reductions_cache.put(word, encoded_word)
+        return encoded_word
+
+    def get_persisted_encoded_word(self, word):
+        if self.encoding_table is None:
+            return None
+        encoded_word = self.encoding_table.get(word)
+        if encoded_word is not None:
+            self.encoding_table_hits += 1
+        return encoded_word
+
+    def add_new_encoded_word(self, word, encoded_word):
+        if self.new_encoded_words is not None:
+            self.new_encoded_words[word] = encoded_word
+
+    def encode_word(self, word):
+        word = self.language_utils.replace_final_letters(word)
+        if self.language_utils.is_word_contains_letters_from_other_languages(word):
+            return self.get_reduction_for_word_with_letters_from_other_languages(word)
+        word_reductions = self.get_word_reductions(word)
+        # the reductions have their new char compiled, the single chars are looked up, and kept when they aren't in the map
+        encoded_chars = [self.compiled_reductions[red][1] if red in self.compiled_reductions else self.new_unicode_chars_map.get(red, red)
+                         for red in word_reductions]
+        return ''.join(encoded_chars)
+
+    def pre_encode_words(self, words, n_workers=1):
+        """
+        Encodes the distinct words of a corpus once, by a pool of workers if n_workers > 1, and keeps them in a read-only
+        table next to the bounded words cache, so process() only looks the words up.
+        The words are the surface words of the texts, as get_words() splits them, not the keys of the trainer's words dict,
+        which are broken by replace_final_letters. Words missing from the table are still encoded by process().
+        """
+        encoded_words_table = dict()
+        words_to_encode = list()
+        for word in words:
+            encoded_word = self.get_persisted_encoded_word(word)
+            if encoded_word is None:
+                words_to_encode.append(word)
+            else:
+                encoded_words_table[word] = encoded_word
+
+        if n_workers <= 1:
+            encoded_words = [self.encode_word(word) for word in words_to_encode]
+        else:
+            words_chunks = [words_to_encode[start:start + PRE_ENCODING_CHUNK_SIZE] for start in range(0, len(words_to_encode), PRE_ENCODING_CHUNK_SIZE)]
+            with multiprocessing.Pool(n_workers, initializer=_init_encoding_worker, initargs=(self,)) as pool:
+                encoded_words = list()
+                for encoded_chunk, worker_updates in pool.imap(_encode_words_chunk, words_chunks):
+                    encoded_words.extend(encoded_chunk)
+                    self.apply_worker_updates(worker_updates)
+
+        for word, encoded_word in zip(words_to_encode, encoded_words):
+            encoded_words_table[word] = encoded_word
+            self.add_new_encoded_word(word, encoded_word)
+        self.pre_encoded_words = encoded_words_table
+
+    def get_encoding_table_key(self):
+        language_utils_class = self.language_utils.__class__
+        return ArtifactsCache.get_key(
+            artifact='encoding_table',
+            # a list of items, since the order of every length reductions ranks them in the beam search
+            reductions_map=[[word_length, list(length_reductions.items())] for word_length, length_reductions in self.reductions_map.items()],
+            new_unicode_chars_map=self.new_unicode_chars_map,
+            language_utils=f'{language_utils_class.__module__}.{language_utils_class.__qualname__}',
+            language_utils_version=language_utils_class.VERSION,
+            text_processor_version=self.VERSION,
+            beam=[self.beam_depth, self.beam_width],
+        )
+
+    def load_encoding_table(self, artifacts_cache: ArtifactsCache = None):
+        """
+        Opens the encoding table persisted for this reductions map, if any, so only the words missing from it are encoded.
+        From now on the newly encoded words are kept, to be added to the table by save_encoding_table().
+        """
+        artifacts_cache = artifacts_cache if artifacts_cache is not None else ArtifactsCache()
+        self.new_encoded_words = dict()
+        cached_table_path = artifacts_cache.get(self.get_encoding_table_key(), 'encoding table')
+        if cached_table_path is not None:
+            self.encoding_table = EncodingTable(f'{cached_table_path}/{self.ENCODING_TABLE_DIR_NAME}')
+            get_logger().info(f'Loaded an encoding table of {len(self.encoding_table)} words')
+        return self.encoding_table is not None
+
+    def save_encoding_table(self, artifacts_cache: ArtifactsCache = None):
+        if not self.new_encoded_words:
+            return
+        artifacts_cache = artifacts_cache if artifacts_cache is not None else ArtifactsCache()
+        encoding_table_key = self.get_encoding_table_key()
+        encoded_words = dict(self.encoding_table.items()) if self.encoding_table is not None else dict()
+        encoded_words.update(self.new_encoded_words)
+        if self.encoding_table is not None:
+            self.encoding_table.close()
+
+        staging_path = artifacts_cache.get_staging_path(encoding_table_key)
+        EncodingTable.save(encoded_words, f'{staging_path}/{self.ENCODING_TABLE_DIR_NAME}')
+        cached_table_path = artifacts_cache.publish(encoding_table_key, f'encoding table of {len(encoded_words)} words')
+        self.encoding_table = EncodingTable(f'{cached_table_path}/{self.ENCODING_TABLE_DIR_NAME}')
+        self.new_encoded_words = dict()
+
     def get_word_reductions(self, word):
         reduced_word = word
         reductions = []
@@ -60,9 +262,9 @@ class TextProcessorWithEncoding(TextProcessorInterface):
             if len(reduced_word) not in self.reductions_map:
                 reductions.extend(self.get_single_chars_reductions(reduced_word))
                 break
-            reduction = self.get_reduction(reduced_word, 3, 3)
+            reduction = self.get_reduction(reduced_word, self.beam_depth, self.beam_width)
             if reduction is not None:
-                position = int(reduction.split(':')[0])
+                position = self.compiled_reductions[reduction][0]
                 reductions.append(reduction)
                 reduced_word = get_permutation(reduced_word, position, len(reduced_word))
             else:
@@ -95,49 +297,107 @@ class TextProcessorWithEncoding(TextProcessorInterface):
         return encoded_text
 
     def get_reduction(self, word, depth, width):
-        curr_step_reductions = [{"word": word, "reduction": None, "root_reduction": None, "score": 1}]
+        # the result depends only on (word, depth, width), and many words reach the same reduced words
+        cache_key = (word, depth, width)
+        max_score_reduction = self.reductions_cache.get(cache_key, NOT_CACHED)
+        if max_score_reduction is NOT_CACHED:
+            max_score_reduction = self.search_reduction(word, depth, width)
+            self.reductions_cache.put(cache_key, max_score_reduction)
+        return max_score_reduction
+
+    def search_reduction(self, word, depth, width):
+        # (word, root_reduction, score) of the current step of the beam
+        curr_step_reductions = [(word, None, 1)]
         word_length = len(word)
         i = 0
         while i < depth and len(curr_step_reductions) > 0 and word_length > 3:
             next_step_reductions = list()
-            for reduction in curr_step_reductions:
-                possible_reductions = self.get_most_frequent_reduction_keys(
-                    reduction["word"],
-                    reduction["root_reduction"],
-                    reduction["score"],
-                    width,
-                    word_length
-                )
-                next_step_reductions += possible_reductions
-            curr_step_reductions = list(next_step_reductions)
+            for reduced_word, root_reduction, parent_score in curr_step_reductions:
+                for permutation, reduction, score in self.get_beam_expansions(reduced_word, width):
+                    next_step_reductions.append((permutation, root_reduction if root_reduction is not None else reduction, parent_score * score))
+            curr_step_reductions = next_step_reductions
             i += 1
             word_length -= 1
 
         max_score_reduction = None
         if len(curr_step_reductions) > 0:
-            max_score_reduction = max(curr_step_reductions, key=lambda x: x["score"])["root_reduction"]
+            max_score_reduction = max(curr_step_reductions, key=lambda x: x[2])[1]
         return max_score_reduction
 
+    def get_beam_expansions(self, word, width):
+        # (permutation, reduction, score) of the word's most frequent reductions, the same at any depth of any beam
+        cache_key = (word, width)
+        beam_expansions = self.beam_expansions_cache.get(cache_key)
+        if beam_expansions is None:
+            beam_expansions = tuple((possible_reduction["word"], possible_reduction["reduction"], possible_reduction["score"])
+                                    for possible_reduction in self.get_most_frequent_reduction_keys(word, None, 1, width, len(word)))
+            self.beam_expansions_cache.put(cache_key, beam_expansions)
+        return beam_expansions
+
+    def get_cache_stats(self):
+        # the counters are those of this processor's caches and of the pool workers' ones, the sizes are this processor's
+        cache_stats = self.get_own_cache_stats()
+        for cache_name, workers_counts in self.workers_cache_counts.items():
+            stats = cache_stats[cache_name]
+            for counter, count in workers_counts.items():
+                stats[counter] = stats.get(counter, 0) + count
+            if 'hit_rate' in stats:
+                lookups = stats['hits'] + stats['misses']
+                stats['hit_rate'] = stats['hits'] / lookups if lookups > 0 else 0.0
+        return cache_stats
+
+    def get_own_cache_stats(self):
+        return {
+            'words': self.word_reductions_cache.get_stats(),
+            'reductions': self.reductions_cache.get_stats(),
+            'beam_expansions': self.beam_expansions_cache.get_stats(),
+            'pre_encoded_words': {'size': len(self.pre_encoded_words) if self.pre_encoded_words is not None else 0},
+            'encoding_table': {
+                'size': len(self.encoding_table) if self.encoding_table is not None else 0,
+                'hits': self.encoding_table_hits,
+                'new_words': len(self.new_encoded_words) if self.new_encoded_words is not None else 0,
+            },
+        }
+
+    def get_cache_counts(self):
+        # cache name -> the counters of this processor's caches
+        return {cache_name: {counter: stats[counter] for counter in CACHE_COUNTER_NAMES if counter in stats}
+                for cache_name, stats in self.get_own_cache_stats().items()}
+
     def get_most_frequent_reduction_keys(self, word, root_reduction, parent_score, number_of_reductions, word_length):
-        if len(word) not in self.reductions_map:
+        if len(word) not in self.reductions_tables:
             return list()
 
+        # only the reductions of the word's letter at each position are looked up, then taken in the map order
+        reductions_table = self.reductions_tables[len(word)]
+        matching_reductions = list()
+        for position in reductions_table.keys():
+            if position < len(word):
+                matching_reductions.extend(reductions_table[position].get(word[position], ()))
+        matching_reductions.sort()
+
         possible_reductions = list()
-        for reduction, score in self.reductions_map[len(word)].items():
+        for _, reduction, position, score, _ in matching_reductions[:number_of_reductions]:
+            permutation = get_permutation(word, position, word_length)
+            possible_reductions.append({
+                "word": permutation,
+                "reduction": reduction,
+                "root_reduction": root_reduction if root_reduction is not None else reduction,
+                "score": parent_score * score
+            })
+        return possible_reductions
+
+    @staticmethod
+    def compile_reductions_table(length_reductions, new_unicode_chars_map):
+        # position -> letter -> [(rank, reduction, position, score, new char)], the "position:letter" keys are parsed once
+        reductions_table = dict()
+        for rank, (reduction, score) in enumerate(length_reductions.items()):
             parts = reduction.split(':')
             if len(parts) < 2: continue
             position, letter = int(parts[0]), parts[1]
-            if position < len(word) and word[position] == letter:
-                permutation = get_permutation(word, position, word_length)
-                possible_reductions.append({
-                    "word": permutation,
-                    "reduction": reduction,
-                    "root_reduction": root_reduction if root_reduction is not None else reduction,
-                    "score": parent_score * score
-                })
-                if len(possible_reductions) >= number_of_reductions:
-                    break
-        return possible_reductions
+            new_char = new_unicode_chars_map.get(reduction, reduction)
+            reductions_table.setdefault(position, dict()).setdefault(letter, list()).append((rank, reduction, position, score, new_char))
+        return reductions_table
 
     @staticmethod
     def get_single_chars_reductions(reduced_word):
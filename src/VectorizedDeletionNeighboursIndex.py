@@ -0,0 +1,129 @@
+from itertools import islice
+
+import numpy as np
+
+from src.DeletionNeighboursIndex import DeletionNeighboursIndex
+from src.utils.utils import get_permutation
+
+# words of a length bucket turned into one code points matrix at a time
+VECTORIZED_CHUNK_SIZE = 100000
+# multiplier of the polynomial words hash, the arithmetic wraps around modulo 2**64
+HASH_BASE = 0x9E3779B97F4A7C15
+HASH_MODULO = 2 ** 64
+
+
+class VectorizedDeletionNeighboursIndex(DeletionNeighboursIndex):
+    """
+    DeletionNeighboursIndex that finds the valid deletions with NumPy, instead of building a string per (word, position).
+    A chunk of a length bucket is held as a 2-D code points array, the hashes of its single-letter deletions are computed
+    for all the words at once from prefix hashes, and looked up in the sorted hashes of the previous length bucket.
+    Every hash match is verified against the code points, so the edges are exactly those of DeletionNeighboursIndex.
+    """
+
+    def __init__(self, words_dict_by_length, letters_for_reductions: [str] = None, max_memory_bytes: int = None,
+                 shorter_words_dict_by_length=None):
+        super().__init__(words_dict_by_length, letters_for_reductions, max_memory_bytes, shorter_words_dict_by_length)
+        # word length -> (sorted hashes of the shorter words, code points in the same order), None if two words share a hash
+        self.buckets_hashes = dict()
+
+    def build_words_edges(self, words, word_length):
+        previous_bucket_hashes = self.get_bucket_hashes(word_length - 1)
+        if previous_bucket_hashes is None:
+            return super().build_words_edges(words, word_length)
+
+        # get_permutation of position -1 is word[:-1] + word, never a shorter word
+        positions = [position for position in self.get_position_range_including_negative_indexes(word_length) if position != -1]
+        length_edges = dict()
+        words = iter(words)
+        chunk_words = list(islice(words, VECTORIZED_CHUNK_SIZE))
+        while len(chunk_words) > 0:
+            length_edges.update(self.build_chunk_edges(chunk_words, word_length, positions, previous_bucket_hashes))
+            chunk_words = list(islice(words, VECTORIZED_CHUNK_SIZE))
+        return length_edges
+
+    def build_chunk_edges(self, words, word_length, positions, previous_bucket_hashes):
+        previous_hashes, previous_codes = previous_bucket_hashes
+        codes = self.get_codes(words, word_length)
+        prefix_hashes = self.get_prefix_hashes(codes)
+        allowed_letters = None
+        if self.letters_for_reductions is not None:
+            allowed_letters = np.array([ord(letter) for letter in self.letters_for_reductions if len(letter) == 1], dtype=np.uint32)
+
+        words_indexes = list()
+        positions_indexes = list()
+        for position_index, position in enumerate(positions):
+            index = position % word_length
+            # hash(word without index) = hash(word) + (prefix[index] * (1 - base) - code[index]) * base ** (length - 1 - index)
+            deletion_hashes = prefix_hashes[:, -1] + (prefix_hashes[:, index] * np.uint64((1 - HASH_BASE) % HASH_MODULO)
+                                                      - codes[:, index]) * np.uint64(pow(HASH_BASE, word_length - 1 - index, HASH_MODULO))
+            found = np.minimum(np.searchsorted(previous_hashes, deletion_hashes), len(previous_hashes) - 1)
+            is_candidate = previous_hashes[found] == deletion_hashes
+            if allowed_letters is not None:
+                is_candidate &= np.isin(codes[:, index], allowed_letters)
+            candidates = np.flatnonzero(is_candidate)
+            is_deletion = np.all(np.delete(codes[candidates], index, axis=1) == previous_codes[found[candidates]], axis=1)
+            words_indexes.append(candidates[is_deletion])
+            positions_indexes.append(np.full(np.count_nonzero(is_deletion), position_index))
+
+        words_indexes = np.concatenate(words_indexes)
+        positions_indexes = np.concatenate(positions_indexes)
+
+        # edges are ordered by word, then by position, like the pure Python index
+        order = np.lexsort((positions_indexes, words_indexes))
+        chunk_edges = dict()
+        for word_index, position_index in zip(words_indexes[order].tolist(), positions_indexes[order].tolist()):
+            word = words[word_index]
+            position = positions[position_index]
+            chunk_edges.setdefault(word, list()).append((position, word[position], get_permutation(word, position, word_length)))
+        return {word: tuple(word_edges) for word, word_edges in chunk_edges.items()}
+
+    def count_compact_edges(self, words, word_length, positions, edges_numbers):
+        if len(positions) == 0:
+            return dict()
+        codes = self.get_codes(words, word_length)
+        words_indexes = np.repeat(np.arange(len(codes)), edges_numbers)
+        letters_codes = codes[words_indexes, positions.astype(np.int64) % word_length]
+        # (position, letter) pairs are numbered position_index * letters number + letter_id, and counted with bincount
+        unique_letters_codes, letters_ids = np.unique(letters_codes, return_inverse=True)
+        positions_indexes = positions.astype(np.int64) + word_length // 2
+        counts = np.bincount(positions_indexes * len(unique_letters_codes) + letters_ids.reshape(-1))
+        reduction_counts = dict()
+        for key_id in np.flatnonzero(counts).tolist():
+            position_index, letter_id = divmod(key_id, len(unique_letters_codes))
+            reduction_key = f"{position_index - word_length // 2}:{chr(unique_letters_codes[letter_id])}"
+            reduction_counts[reduction_key] = int(counts[key_id])
+        return reduction_counts
+
+    def get_bucket_hashes(self, word_length):
+        if word_length not in self.buckets_hashes:
+            codes = self.get_codes(list(self.shorter_words_dict_by_length[word_length]), word_length)
+            hashes = self.get_prefix_hashes(codes)[:, -1]
+            order = np.argsort(hashes)
+            sorted_hashes = hashes[order]
+            if np.any(sorted_hashes[1:] == sorted_hashes[:-1]):
+                # a 64 bits collision, the length is left to the pure Python index
+                self.buckets_hashes[word_length] = None
+            else:
+                self.buckets_hashes[word_length] = (sorted_hashes, codes[order])
+        return self.buckets_hashes[word_length]
+
+    @staticmethod
+    def get_codes(words, word_length):
+        return np.array(words, dtype=f'<U{word_length}').view(np.uint32).reshape(len(words), word_length)
+
+    @staticmethod
+    def get_prefix_hashes(codes):
+        prefix_hashes = np.zeros((codes.shape[0], codes.shape[1] + 1), dtype=np.uint64)
+        for index in range(codes.shape[1]):
+            prefix_hashes[:, index + 1] = prefix_hashes[:, index] * np.uint64(HASH_BASE) + codes[:, index]
+        return prefix_hashes
+
+    def validate(self, word_lengths):
+        # compares the edges and reduction counts with the pure Python index
+        python_index = DeletionNeighboursIndex(self.words_dict_by_length, self.letters_for_reductions,
+                                               shorter_words_dict_by_length=self.shorter_words_dict_by_length)
+        for word_length in word_lengths:
+            if self.get_length_edges(word_length) != python_index.get_length_edges(word_length):
+                raise ValueError(f'vectorized edges of word length {word_length} differ from the pure Python ones')
+            if self.count_length_reductions(word_length) != python_index.count_length_reductions(word_length):
+                raise ValueError(f'vectorized reduction counts of word length {word_length} differ from the pure Python ones')
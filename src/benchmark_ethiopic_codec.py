@@ -0,0 +1,143 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from geez_syllable.syllable_breaker import GeEzSyllableBreaker
+from src.language_utils.EthiopicSyllableCodec import EthiopicSyllableCodec, LAYOUT_INTERLEAVED, LAYOUT_WORD_END
+from src.language_utils.geez_utils import GeezUtils
+from src.logger import get_logger, initialize_logger
+from src.params import set_run_params, get_dummy_experiment
+from src.utils.path_utils import get_logs_dir
+
+BENCHMARK_EXPERIMENT_NAME = '2025-01-21-geez-all_letters'
+BENCHMARK_WORDS_NUMBER = 500000
+BENCHMARK_SEED = 42
+
+
+def loop_replace_final_letters(word):
+    # GeezUtils.replace_final_letters before the codec, kept as the benchmark's reference
+    decomposed = ""
+    for char in word:
+        cp = ord(char)
+        if GeezUtils.GEEZ_UNICODE_BLOCK[0] <= cp <= GeezUtils.GEEZ_UNICODE_BLOCK[1]:
+            order = cp % 8
+            base_char = chr(cp - order)
+            vowel_tag = GeezUtils.VOWEL_MARKERS.get(order, "")
+            decomposed += base_char + vowel_tag
+        else:
+            decomposed += char
+    return decomposed
+
+
+def loop_break_word(breaker: GeEzSyllableBreaker, word):
+    # GeEzSyllableBreaker.break_word before the codec, kept as the benchmark's reference
+    result = []
+    vowel_tags = []
+    for char in word:
+        if breaker.is_geez_character(char):
+            base, vowel = breaker.break_syllable(char)
+            result.append(base)
+            if vowel:
+                vowel_tags.append(vowel)
+        else:
+            result.append(char)
+    return ''.join(result) + ''.join(vowel_tags)
+
+
+def get_random_geez_words(words_number, seed=BENCHMARK_SEED):
+    # words of 2-7 syllables of the whole block, some of them with a Latin letter or a digit
+    random_generator = random.Random(seed)
+    syllables = [chr(code_point) for code_point in range(EthiopicSyllableCodec.BLOCK_START, EthiopicSyllableCodec.BLOCK_END + 1)]
+    words = list()
+    for _ in range(words_number):
+        word = ''.join(random_generator.choices(syllables, k=random_generator.randint(2, 7)))
+        if random_generator.random() < 0.05:
+            word += random_generator.choice('abc123')
+        words.append(word)
+    return words
+
+
+def benchmark_ethiopic_codec(words):
+    chars_number = sum(len(word) for word in words)
+    geez_utils = GeezUtils()
+    breaker = GeEzSyllableBreaker()
+    results = dict()
+    for name, loop_function, codec_function in [
+        ('GeezUtils.replace_final_letters', loop_replace_final_letters, geez_utils.replace_final_letters),
+        ('GeEzSyllableBreaker.break_word', lambda word: loop_break_word(breaker, word), breaker.break_word),
+    ]:
+        seconds = dict()
+        outputs = dict()
+        for implementation, function in [('loop', loop_function), ('codec', codec_function)]:
+            start = time.perf_counter()
+            outputs[implementation] = [function(word) for word in words]
+            seconds[implementation] = time.perf_counter() - start
+        if outputs['loop'] != outputs['codec']:
+            raise ValueError(f'{name} with the codec differs from the per-character loop')
+        results[name] = {implementation: chars_number / seconds[implementation] for implementation in seconds}
+        get_logger().info(f'{name}: {results[name]["loop"]:.0f} chars/sec before, {results[name]["codec"]:.0f} chars/sec with the codec '
+                          f'({seconds["loop"] / seconds["codec"]:.1f}x), same output')
+    return results
+
+
+def benchmark_text_breaking(words, line_words_number=12):
+    # a whole text buffer broken at once with NumPy, against breaking it word by word with the codec
+    text = '\n'.join(' '.join(words[start:start + line_words_number]) for start in range(0, len(words), line_words_number))
+    geez_utils = GeezUtils()
+    breaker = GeEzSyllableBreaker()
+    results = dict()
+    for name, words_function, text_function in [
+        ('interleaved', lambda: geez_utils.replace_final_letters(text), lambda: geez_utils.codec.break_text(text, LAYOUT_INTERLEAVED)),
+        ('word_end', lambda: '\n'.join(' '.join(breaker.break_word(word) for word in line.split(' ')) for line in text.split('\n')),
+         lambda: breaker.break_text(text, LAYOUT_WORD_END)),
+    ]:
+        seconds = dict()
+        outputs = dict()
+        for implementation, function in [('words', words_function), ('text', text_function)]:
+            start = time.perf_counter()
+            outputs[implementation] = function()
+            seconds[implementation] = time.perf_counter() - start
+        if outputs['words'] != outputs['text']:
+            raise ValueError(f'{name} layout of the whole text differs from breaking it word by word')
+        results[name] = {implementation: len(text) / seconds[implementation] for implementation in seconds}
+        get_logger().info(f'{name} layout: {results[name]["words"]:.0f} chars/sec by words, '
+                          f'{results[name]["text"]:.0f} chars/sec for the whole text, same output')
+    return results
+
+
+def benchmark_restoring(words):
+    # restore_word word by word, against the batch restore of the words list and of the whole document
+    breaker = GeEzSyllableBreaker()
+    broken_words = [breaker.break_word(word) for word in words]
+    broken_text = ' '.join(broken_words)
+    seconds = dict()
+    outputs = dict()
+    for implementation, function in [
+        ('restore_word', lambda: ' '.join(breaker.restore_word(word) for word in broken_words)),
+        ('restore_words', lambda: ' '.join(breaker.restore_words(broken_words))),
+        ('restore_text', lambda: breaker.restore_text(broken_text)),
+    ]:
+        start = time.perf_counter()
+        outputs[implementation] = function()
+        seconds[implementation] = time.perf_counter() - start
+    if len(set(outputs.values())) > 1 or outputs['restore_word'] != ' '.join(words):
+        raise ValueError('the batch restore differs from restore_word')
+    results = {implementation: len(words) / seconds[implementation] for implementation in seconds}
+    get_logger().info('restoring: ' + ', '.join(f'{implementation} {words_per_second:.0f} words/sec'
+                                                  for implementation, words_per_second in results.items()) + ', same words')
+    return results
+
+
+if __name__ == '__main__':
+    experiment = get_dummy_experiment(BENCHMARK_EXPERIMENT_NAME)
+    set_run_params(experiment)
+    os.makedirs(get_logs_dir(), exist_ok=True)
+    initialize_logger()
+
+    benchmark_words = get_random_geez_words(BENCHMARK_WORDS_NUMBER)
+    benchmark_ethiopic_codec(benchmark_words)
+    benchmark_text_breaking(benchmark_words)
+    benchmark_restoring(benchmark_words)
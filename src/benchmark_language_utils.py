@@ -0,0 +1,98 @@
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from geez_syllable.language_adapter import GeEzLanguageAdapter
+from src.language_utils.LanguageUtilsFactory import LanguageUtilsFactory
+from src.language_utils.geez_utils import GeezUtils
+from src.logger import get_logger, initialize_logger
+from src.params import set_run_params, get_dummy_experiment
+from src.utils.path_utils import get_logs_dir
+
+BENCHMARK_EXPERIMENT_NAME = '2025-01-21-geez-all_letters'
+BENCHMARK_WORDS_NUMBER = 200000
+BENCHMARK_SEED = 42
+# share of the benchmark words with a letter from another language
+FOREIGN_WORDS_SHARE = 0.1
+FOREIGN_LETTERS = '0123456789.-abcxyzабв中'
+
+
+def loop_geez_contains_letters_from_other_languages(geez_utils: GeezUtils, word):
+    # GeezUtils.is_word_contains_letters_from_other_languages before the compiled pattern, kept as the benchmark's reference
+    for c in word:
+        if geez_utils.is_letter_in_language(c):
+            continue
+        cp = ord(c)
+        if 0x1360 <= cp <= 0x1368 or c.isspace():
+            continue
+        return True
+    return False
+
+
+def loop_adapter_contains_letters_from_other_languages(adapter: GeEzLanguageAdapter, word):
+    # GeEzLanguageAdapter.is_word_contains_letters_from_other_languages before the compiled pattern
+    for char in word:
+        if (char not in adapter.breaker.marker_to_vowel and
+                not adapter.breaker.is_geez_character(char) and
+                char not in ' \t\n\r'):
+            return True
+    return False
+
+
+def get_reference_checks():
+    # utils name -> (utils, the check before the compiled patterns)
+    hebrew_utils = LanguageUtilsFactory.get_by_language('he')
+    arabic_utils = LanguageUtilsFactory.get_by_language('ar')
+    malay_utils = LanguageUtilsFactory.get_by_language('ms')
+    geez_utils = LanguageUtilsFactory.get_by_language('gez')
+    adapter = GeEzLanguageAdapter()
+    return {
+        'HebrewUtils': (hebrew_utils, lambda word: re.search(r'[^\u05D0-\u05EA]', word) is not None),
+        'ArabicUtils': (arabic_utils, lambda word: re.search(r'[^\u0621-\u064A]', word) is not None),
+        'MalayUtils': (malay_utils, lambda word: re.search(r'[^a-zA-Z]', word) is not None),
+        'GeezUtils': (geez_utils, lambda word: loop_geez_contains_letters_from_other_languages(geez_utils, word)),
+        'GeEzLanguageAdapter': (adapter, lambda word: loop_adapter_contains_letters_from_other_languages(adapter, word)),
+    }
+
+
+def get_random_words(alphabet, words_number, seed=BENCHMARK_SEED):
+    random_generator = random.Random(seed)
+    words = list()
+    for _ in range(words_number):
+        word = ''.join(random_generator.choices(alphabet, k=random_generator.randint(2, 9)))
+        if random_generator.random() < FOREIGN_WORDS_SHARE:
+            position = random_generator.randint(0, len(word))
+            word = word[:position] + random_generator.choice(FOREIGN_LETTERS) + word[position:]
+        words.append(word)
+    return words
+
+
+def benchmark_foreign_letters_detection(words_number=BENCHMARK_WORDS_NUMBER):
+    results = dict()
+    for name, (language_utils, reference_check) in get_reference_checks().items():
+        words = get_random_words(language_utils.get_language_alphabet(), words_number)
+        seconds = dict()
+        outputs = dict()
+        for implementation, check in [('before', reference_check), ('compiled', language_utils.is_word_contains_letters_from_other_languages)]:
+            start = time.perf_counter()
+            outputs[implementation] = [check(word) for word in words]
+            seconds[implementation] = time.perf_counter() - start
+        if outputs['before'] != outputs['compiled']:
+            raise ValueError(f'{name} compiled foreign letters detection differs from the previous one')
+        results[name] = {implementation: words_number / seconds[implementation] for implementation in seconds}
+        get_logger().info(f'{name}: {results[name]["before"]:.0f} words/sec before, {results[name]["compiled"]:.0f} words/sec compiled '
+                          f'({seconds["before"] / seconds["compiled"]:.1f}x), same results')
+    return results
+
+
+if __name__ == '__main__':
+    experiment = get_dummy_experiment(BENCHMARK_EXPERIMENT_NAME)
+    set_run_params(experiment)
+    os.makedirs(get_logs_dir(), exist_ok=True)
+    initialize_logger()
+
+    benchmark_foreign_letters_detection()
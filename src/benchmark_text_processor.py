@@ -0,0 +1,143 @@
+import os
+import re
+import time
+
+from src.TextProcessorWithEncoding import TextProcessorWithEncoding, ENCODING_MODES, DEFAULT_ENCODING_MODE
+from src.language_utils.LanguageUtilsFactory import LanguageUtilsFactory
+from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
+from src.logger import get_logger, initialize_logger
+from src.params import set_run_params, get_dummy_experiment
+from src.utils.path_utils import get_logs_dir, get_corpus_path
+from src.utils.utils import (get_reductions_map_from_file, get_new_unicode_chars_map_from_file,
+                             get_new_unicode_chars_inverted_map_from_file, get_permutation)
+
+BENCHMARK_EXPERIMENT_NAME = '2025-01-21-geez-all_letters'
+BENCHMARK_CORPUS_NAME = 'default'
+BENCHMARK_MAX_WORDS = 100000
+
+
+class ScanningTextProcessor(TextProcessorWithEncoding):
+    """
+    The reduction lookup before the compiled tables and the beam cache, kept as the benchmark's reference:
+    every reduction step runs the whole beam, and every beam node scans and parses the reductions map of the word length.
+    """
+
+    def get_reduction(self, word, depth, width):
+        curr_step_reductions = [{"word": word, "reduction": None, "root_reduction": None, "score": 1}]
+        word_length = len(word)
+        i = 0
+        while i < depth and len(curr_step_reductions) > 0 and word_length > 3:
+            next_step_reductions = list()
+            for reduction in curr_step_reductions:
+                possible_reductions = self.get_most_frequent_reduction_keys(
+                    reduction["word"],
+                    reduction["root_reduction"],
+                    reduction["score"],
+                    width,
+                    word_length
+                )
+                next_step_reductions += possible_reductions
+            curr_step_reductions = list(next_step_reductions)
+            i += 1
+            word_length -= 1
+
+        max_score_reduction = None
+        if len(curr_step_reductions) > 0:
+            max_score_reduction = max(curr_step_reductions, key=lambda x: x["score"])["root_reduction"]
+        return max_score_reduction
+
+    def get_most_frequent_reduction_keys(self, word, root_reduction, parent_score, number_of_reductions, word_length):
+        if len(word) not in self.reductions_map:
+            return list()
+
+        possible_reductions = list()
+        for reduction, score in self.reductions_map[len(word)].items():
+            parts = reduction.split(':')
+            if len(parts) < 2: continue
+            position, letter = int(parts[0]), parts[1]
+            if position < len(word) and word[position] == letter:
+                permutation = get_permutation(word, position, word_length)
+                possible_reductions.append({
+                    "word": permutation,
+                    "reduction": reduction,
+                    "root_reduction": root_reduction if root_reduction is not None else reduction,
+                    "score": parent_score * score
+                })
+                if len(possible_reductions) >= number_of_reductions:
+                    break
+        return possible_reductions
+
+
+def benchmark_reduction_lookup(language_utils: LanguageUtilsInterface, reductions_map, new_unicode_chars_map,
+                               new_unicode_chars_inverted_map, words):
+    # the words are reduced directly, without the words cache of process(), so every word runs the beam search
+    words = [language_utils.replace_final_letters(word) for word in words]
+    words = [word for word in words if not language_utils.is_word_contains_letters_from_other_languages(word)]
+    seconds = dict()
+    words_reductions = dict()
+    for name, processor_class in [('scan', ScanningTextProcessor), ('compiled', TextProcessorWithEncoding)]:
+        text_processor = processor_class(language_utils, reductions_map, new_unicode_chars_map, new_unicode_chars_inverted_map)
+        start = time.perf_counter()
+        words_reductions[name] = [text_processor.get_word_reductions(word) for word in words]
+        seconds[name] = time.perf_counter() - start
+        get_logger().info(f'{name} reduction lookup: {len(words)} words in {seconds[name]:.2f}s '
+                          f'({seconds[name] / max(len(words), 1) * 1e6:.1f}us per word)')
+        if name == 'compiled':
+            get_logger().info(f'caches: {text_processor.get_cache_stats()}')
+
+    if words_reductions['scan'] != words_reductions['compiled']:
+        raise ValueError('the compiled reduction lookup reduced some words differently from the scanning one')
+    get_logger().info(f'compiled reduction lookup speed-up: {seconds["scan"] / seconds["compiled"]:.1f}x, same reductions')
+    return seconds
+
+
+def benchmark_encoding_modes(language_utils: LanguageUtilsInterface, reductions_map, new_unicode_chars_map,
+                             new_unicode_chars_inverted_map, words):
+    # encodes the words with every mode, and reports the throughput and the share of words encoded unlike the exact mode
+    results = dict()
+    encoded_words_by_mode = dict()
+    for encoding_mode in [DEFAULT_ENCODING_MODE] + [mode for mode in ENCODING_MODES if mode != DEFAULT_ENCODING_MODE]:
+        text_processor = TextProcessorWithEncoding(language_utils, reductions_map, new_unicode_chars_map,
+                                                   new_unicode_chars_inverted_map, encoding_mode=encoding_mode)
+        start = time.perf_counter()
+        encoded_words_by_mode[encoding_mode] = [text_processor.encode_word(word) for word in words]
+        seconds = time.perf_counter() - start
+        different_words_number = sum(encoded_word != exact_encoded_word for encoded_word, exact_encoded_word
+                                     in zip(encoded_words_by_mode[encoding_mode], encoded_words_by_mode[DEFAULT_ENCODING_MODE]))
+        results[encoding_mode] = {
+            'words_per_second': len(words) / max(seconds, 1e-9),
+            'different_from_exact': different_words_number / max(len(words), 1),
+        }
+        get_logger().info(f'{encoding_mode} encoding {ENCODING_MODES[encoding_mode]}: {len(words)} words in {seconds:.2f}s '
+                          f'({results[encoding_mode]["words_per_second"]:.0f} words/sec), '
+                          f'{results[encoding_mode]["different_from_exact"]:.2%} encoded differently from {DEFAULT_ENCODING_MODE}')
+    return results
+
+
+def get_corpus_words(corpus_name, max_words):
+    words = dict()
+    with open(get_corpus_path(corpus_name), 'r', encoding='utf-8') as file:
+        for line in file:
+            for word in re.split(r'\s+', line):
+                if word:
+                    words[word] = None
+            if len(words) >= max_words:
+                break
+    return list(words)[:max_words]
+
+
+if __name__ == '__main__':
+    experiment = get_dummy_experiment(BENCHMARK_EXPERIMENT_NAME)
+    set_run_params(experiment)
+    os.makedirs(get_logs_dir(), exist_ok=True)
+    initialize_logger()
+
+    benchmark_args = (
+        LanguageUtilsFactory.get_by_language(experiment['LANGUAGE']),
+        get_reductions_map_from_file(),
+        get_new_unicode_chars_map_from_file(),
+        get_new_unicode_chars_inverted_map_from_file(),
+        get_corpus_words(BENCHMARK_CORPUS_NAME, BENCHMARK_MAX_WORDS),
+    )
+    benchmark_reduction_lookup(*benchmark_args)
+    benchmark_encoding_modes(*benchmark_args)
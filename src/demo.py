@@ -5,7 +5,7 @@ from src.TextProcessorForDemo import TextProcessorForDemo
 from src.language_utils.LanguageUtilsFactory import LanguageUtilsFactory
 from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 from src.logger import get_logger, initialize_logger
-from src.params import set_run_params, get_dummy_experiment
+from src.params import set_run_params, get_run_params, get_dummy_experiment
 from src.utils.path_utils import get_logs_dir, get_tokenizers_dir
 from src.utils.utils import (get_reductions_map_from_file, get_new_unicode_chars_map_from_file,
                              get_new_unicode_chars_inverted_map_from_file)
@@ -16,6 +16,8 @@ def demo(text: str, language_utils: LanguageUtilsInterface) -> None:
     
     # Process converts raw Ge'ez -> Decomposed (Root + PUA) -> Splintered encoding
     non_encoded_text, encoded_text = text_processor.process(text)
+    if get_run_params("ENCODING_PERSISTENT_TABLE"):
+        text_processor.save_encoding_table()
     
     get_logger().info(f'\n\nNon-encoded splintered text: \n{non_encoded_text}')
     get_logger().info(f'\n\nEncoded splintered text: \n{encoded_text}')
@@ -31,6 +33,9 @@ def get_processor(language_utils: LanguageUtilsInterface) -> TextProcessorForDem
     new_unicode_chars_map = get_new_unicode_chars_map_from_file()
     new_unicode_chars_inverted_map = get_new_unicode_chars_inverted_map_from_file()
     text_processor = TextProcessorForDemo(language_utils, reductions_map, new_unicode_chars_map, new_unicode_chars_inverted_map)
+    # starts warm from the encodings persisted by the corpora runs with the same reductions map, only when they are persisted
+    if get_run_params("ENCODING_PERSISTENT_TABLE"):
+        text_processor.load_encoding_table()
     return text_processor
 
 def tokenize_example(text: str, tokenizer_type: str, vocab_size: int) -> None:
@@ -4,6 +4,9 @@ from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 
 
 class ArabicUtils(LanguageUtilsInterface):
+    # compiled once, the check runs for every word of the corpora
+    FOREIGN_LETTERS_PATTERN = re.compile(r'[^\u0621-\u064A]')
+
     def remove_diacritics(self, text: str) -> str:
         # text = text.replace('\u0622', '\u0627')
         # text = text.replace('\u0623', '\u0627')
@@ -16,7 +19,7 @@ class ArabicUtils(LanguageUtilsInterface):
         return '\u0621' <= char <= '\u064A'
 
     def is_word_contains_letters_from_other_languages(self, word: str) -> bool:
-        return re.search(r'[^\u0621-\u064A]', word) is not None
+        return self.FOREIGN_LETTERS_PATTERN.search(word) is not None
 
     def get_language_alphabet(self) -> [str]:
         return [chr(char) for char in range(0x0621, 0x064A + 1)]
@@ -0,0 +1,175 @@
+import re
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+LAYOUT_INTERLEAVED = 'interleaved'
+LAYOUT_WORD_END = 'word_end'
+
+
+@lru_cache(maxsize=None)
+def _get_whitespace_code_points():
+    # the separators of str.split(), computed once for np.isin
+    return np.array([code_point for code_point in range(sys.maxunicode + 1) if chr(code_point).isspace()], dtype=np.uint32)
+
+
+class _DeletingTable(dict):
+    # str.translate table that deletes the characters it doesn't map, instead of keeping them
+    def __missing__(self, code_point):
+        return None
+
+
+class EthiopicSyllableCodec:
+    """
+    Precompiled tables for breaking the syllables of the Ethiopic block into a base consonant (code point - code point % 8)
+    and a vowel marker, applied to whole strings by str.translate instead of character by character.
+    vowel_markers maps a vowel order (code point % 8) to its marker, orders without a marker break into the base alone.
+    """
+
+    BLOCK_START = 0x1200
+    BLOCK_END = 0x137F
+
+    def __init__(self, vowel_markers):
+        self.vowel_markers = dict(vowel_markers)
+        self.marker_to_order = {marker: order for order, marker in self.vowel_markers.items()}
+        code_points = range(self.BLOCK_START, self.BLOCK_END + 1)
+        # syllable -> base consonant followed by its vowel marker
+        self.decomposition_table = {code_point: chr(code_point - code_point % 8) + self.vowel_markers.get(code_point % 8, '')
+                                    for code_point in code_points}
+        # syllable -> base consonant
+        self.bases_table = {code_point: chr(code_point - code_point % 8) for code_point in code_points}
+        # syllable -> vowel marker, the other characters are deleted
+        self.markers_table = _DeletingTable({code_point: self.vowel_markers.get(code_point % 8) for code_point in code_points})
+        # consonant + vowel marker -> syllable, the inverse of the decomposition
+        self.composition_table = {chr(code_point) + marker: chr(code_point + order)
+                                  for code_point in code_points for order, marker in self.vowel_markers.items()}
+        # vowel order -> marker code point, 0 for the orders without a marker
+        self.marker_codes = np.array([ord(self.vowel_markers[order]) if self.vowel_markers.get(order) else 0 for order in range(8)],
+                                     dtype=np.uint32)
+        # marker code points sorted for np.searchsorted, and their vowel orders
+        sorted_markers = sorted((ord(marker), order) for marker, order in self.marker_to_order.items() if marker)
+        self.sorted_marker_codes = np.array([code for code, _ in sorted_markers], dtype=np.uint32)
+        self.sorted_marker_orders = np.array([order for _, order in sorted_markers], dtype=np.uint32)
+        self.composition_pattern = re.compile(
+            f'[{chr(self.BLOCK_START)}-{chr(self.BLOCK_END)}][{"".join(re.escape(marker) for marker in self.marker_to_order)}]')
+
+    def is_geez_character(self, char):
+        return len(char) == 1 and self.BLOCK_START <= ord(char) <= self.BLOCK_END
+
+    def decompose(self, text):
+        # every syllable is replaced by its base consonant and vowel marker, e.g. 'ባሱ' -> 'በ' + marker(1) + 'ሰ' + marker(2)
+        return text.translate(self.decomposition_table)
+
+    def split_bases_and_markers(self, text):
+        # (text with the syllables replaced by their base consonants, the vowel markers of the syllables in order)
+        return text.translate(self.bases_table), text.translate(self.markers_table)
+
+    def compose(self, decomposed_text):
+        # consonants followed by a vowel marker are joined back into their syllable, the other characters are kept
+        return self.composition_pattern.sub(lambda match: self.composition_table[match.group()], decomposed_text)
+
+    def break_text(self, text, layout=LAYOUT_INTERLEAVED):
+        """
+        Breaks all the syllables of a text at once with NumPy, over its code points array.
+        LAYOUT_INTERLEAVED puts every marker after its base consonant, like decompose().
+        LAYOUT_WORD_END puts the markers of every whitespace separated word after the word, like breaking each word
+        into bases + markers, and keeps the whitespace as is.
+        """
+        codes = self.get_codes(text)
+        if len(codes) == 0:
+            return text
+        is_geez = (codes >= self.BLOCK_START) & (codes <= self.BLOCK_END)
+        orders = codes % 8
+        bases = np.where(is_geez, codes - orders, codes)
+        marker_codes = self.marker_codes[orders]
+        has_marker = is_geez & (marker_codes != 0)
+        # markers before each position, the shift of the characters after them
+        markers_before = np.cumsum(has_marker) - has_marker
+
+        if layout == LAYOUT_INTERLEAVED:
+            bases_positions = np.arange(len(codes)) + markers_before
+            markers_positions = bases_positions + 1
+        elif layout == LAYOUT_WORD_END:
+            # a word's characters are shifted by the markers of the previous words, and its markers follow its last character
+            is_space = np.isin(codes, _get_whitespace_code_points())
+            is_word_start = self.get_words_starts(is_space)
+            is_word_end = np.ones(len(codes), dtype=bool)
+            is_word_end[:-1] = is_space[:-1] | is_space[1:]
+            indexes = np.arange(len(codes))
+            word_starts = np.maximum.accumulate(np.where(is_word_start, indexes, 0))
+            word_ends = np.minimum.accumulate(np.where(is_word_end, indexes, len(codes))[::-1])[::-1] + 1
+            bases_positions = indexes + markers_before[word_starts]
+            markers_positions = word_ends + markers_before
+        else:
+            raise ValueError(f'unknown layout {layout}, expected {LAYOUT_INTERLEAVED} or {LAYOUT_WORD_END}')
+
+        broken_codes = np.empty(len(codes) + int(np.count_nonzero(has_marker)), dtype=np.uint32)
+        broken_codes[bases_positions] = bases
+        broken_codes[markers_positions[has_marker]] = marker_codes[has_marker]
+        return broken_codes.tobytes().decode('utf-32-le')
+
+    def restore_text(self, text):
+        """
+        Restores the syllables of a whole text broken with LAYOUT_WORD_END at once with NumPy: in every whitespace
+        separated word, the vowel markers are given in order to the word's Ge'ez consonants, and removed.
+        """
+        codes = self.get_codes(text)
+        if len(codes) == 0:
+            return text
+        is_word_start = self.get_words_starts(np.isin(codes, _get_whitespace_code_points()))
+        return self.restore_codes(codes, is_word_start).tobytes().decode('utf-32-le')
+
+    def restore_words(self, words):
+        # like restore_text, with every word of the list restored on its own, whatever characters it contains
+        words = list(words)
+        codes = self.get_codes(''.join(words))
+        lengths = np.array([len(word) for word in words], dtype=np.int64)
+        is_word_start = np.zeros(len(codes), dtype=bool)
+        is_word_start[(np.cumsum(lengths) - lengths)[lengths > 0]] = True
+        restored_text = self.restore_codes(codes, is_word_start).tobytes().decode('utf-32-le')
+
+        restored_words = list()
+        restored_start = 0
+        for restored_length in (lengths - self.count_words_markers(codes, lengths)).tolist():
+            restored_words.append(restored_text[restored_start:restored_start + restored_length])
+            restored_start += restored_length
+        return restored_words
+
+    def restore_codes(self, codes, is_word_start):
+        if len(codes) == 0:
+            return codes
+        found = np.minimum(np.searchsorted(self.sorted_marker_codes, codes), len(self.sorted_marker_codes) - 1)
+        is_marker = self.sorted_marker_codes[found] == codes
+        markers_orders = self.sorted_marker_orders[found[is_marker]]
+        is_geez = (codes >= self.BLOCK_START) & (codes <= self.BLOCK_END) & ~is_marker
+
+        indexes = np.arange(len(codes))
+        word_starts = np.maximum.accumulate(np.where(is_word_start, indexes, 0))
+        words_indexes = np.cumsum(is_word_start) - 1
+        markers_before = np.cumsum(is_marker) - is_marker
+        geez_before = np.cumsum(is_geez) - is_geez
+        # the k-th Ge'ez consonant of a word gets the k-th marker of the word, if the word has one
+        geez_ranks = geez_before - geez_before[word_starts]
+        words_markers_numbers = np.bincount(words_indexes, weights=is_marker, minlength=words_indexes[-1] + 1).astype(np.int64)
+        gets_vowel = is_geez & (geez_ranks < words_markers_numbers[words_indexes])
+
+        restored_codes = codes.copy()
+        restored_codes[gets_vowel] += markers_orders[(markers_before[word_starts] + geez_ranks)[gets_vowel]]
+        return restored_codes[~is_marker]
+
+    def count_words_markers(self, codes, lengths):
+        is_marker = np.isin(codes, self.sorted_marker_codes)
+        markers_before_words = np.concatenate(([0], np.cumsum(is_marker)))[np.cumsum(lengths) - lengths]
+        return np.diff(np.append(markers_before_words, np.count_nonzero(is_marker)))
+
+    @staticmethod
+    def get_codes(text):
+        return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+    @staticmethod
+    def get_words_starts(is_space):
+        # every whitespace character is a word of its own
+        is_word_start = np.ones(len(is_space), dtype=bool)
+        is_word_start[1:] = is_space[1:] | is_space[:-1]
+        return is_word_start
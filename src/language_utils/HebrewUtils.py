@@ -6,6 +6,9 @@ from src.save_dataset_as_text_file import save_hedc4_corpus, save_pre_modern_cor
 
 
 class HebrewUtils(LanguageUtilsInterface):
+    # compiled once, the check runs for every word of the corpora
+    FOREIGN_LETTERS_PATTERN = re.compile(r'[^\u05D0-\u05EA]')
+
     def remove_diacritics(self, text: str) -> str:
         return re.sub(r'[\u0590-\u05CF]', '', text)
 
@@ -13,7 +16,7 @@ class HebrewUtils(LanguageUtilsInterface):
         return '\u05D0' <= char <= '\u05EA'
 
     def is_word_contains_letters_from_other_languages(self, word: str) -> bool:
-        return re.search(r'[^\u05D0-\u05EA]', word) is not None
+        return self.FOREIGN_LETTERS_PATTERN.search(word) is not None
 
     def get_language_alphabet(self) -> [str]:
         return [chr(char) for char in range(0x05D0, 0x05EA + 1)]
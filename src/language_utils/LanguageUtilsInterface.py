@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 
 
 class LanguageUtilsInterface(ABC):
+    # part of the cache key of every artifact built with these utils - bump it when the text normalization changes
+    VERSION = 1
 
     @abstractmethod
     def remove_diacritics(self, text: str) -> str:
@@ -4,6 +4,9 @@ from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 
 
 class MalayUtils(LanguageUtilsInterface):
+    # compiled once, the check runs for every word of the corpora
+    FOREIGN_LETTERS_PATTERN = re.compile(r'[^a-zA-Z]')
+
     def remove_diacritics(self, text: str) -> str:
         return text
 
@@ -11,7 +14,7 @@ class MalayUtils(LanguageUtilsInterface):
         return ('A' <= char <= 'Z') or ('a' <= char <= 'z')
 
     def is_word_contains_letters_from_other_languages(self, word: str) -> bool:
-        return re.search(r'[^a-zA-Z]', word) is not None
+        return self.FOREIGN_LETTERS_PATTERN.search(word) is not None
 
     def get_language_alphabet(self) -> [str]:
         return [chr(i) for i in range(97, 123)] + [chr(i) for i in range(65, 91)]
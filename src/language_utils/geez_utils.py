@@ -1,3 +1,6 @@
+import re
+
+from src.language_utils.EthiopicSyllableCodec import EthiopicSyllableCodec
 from src.language_utils.LanguageUtilsInterface import LanguageUtilsInterface
 
 class GeezUtils(LanguageUtilsInterface):
@@ -8,9 +11,12 @@ class GeezUtils(LanguageUtilsInterface):
         4: "\uE005", 5: "\uE006", 6: "\uE007"
     }
     MARKER_TO_ORDER = {v: k for k, v in VOWEL_MARKERS.items()}
+    # any character that is not Ge'ez (the punctuation 0x1360-0x1368 is in the block), a vowel marker or whitespace
+    FOREIGN_LETTERS_PATTERN = re.compile(r'[^\u1200-\u137F\uE001-\uE007\s]')
 
     def __init__(self):
         self.alphabet = [chr(i) for i in range(self.GEEZ_UNICODE_BLOCK[0], self.GEEZ_UNICODE_BLOCK[1] + 1)]
+        self.codec = EthiopicSyllableCodec(self.VOWEL_MARKERS)
 
     def remove_diacritics(self, text: str) -> str:
         """Ge'ez syllables are inherent; returning text unchanged."""
@@ -25,14 +31,7 @@ class GeezUtils(LanguageUtilsInterface):
         return self.alphabet
 
     def is_word_contains_letters_from_other_languages(self, word: str) -> bool:
-        for c in word:
-            if self.is_letter_in_language(c): 
-                continue
-            cp = ord(c)
-            if 0x1360 <= cp <= 0x1368 or c.isspace(): 
-                continue
-            return True
-        return False
+        return self.FOREIGN_LETTERS_PATTERN.search(word) is not None
 
     def replace_final_letters(self, word: str):
         """
@@ -40,17 +39,7 @@ class GeezUtils(LanguageUtilsInterface):
         Converts syllables into base consonant + PUA vowel tag.
         Example: 'ባሱማ' -> 'በ\uE001ሰ\uE002መ\uE003'
         """
-        decomposed = ""
-        for char in word:
-            cp = ord(char)
-            if self.GEEZ_UNICODE_BLOCK[0] <= cp <= self.GEEZ_UNICODE_BLOCK[1]:
-                order = cp % 8 
-                base_char = chr(cp - order)
-                vowel_tag = self.VOWEL_MARKERS.get(order, "")
-                decomposed += base_char + vowel_tag
-            else:
-                decomposed += char
-        return decomposed
+        return self.codec.decompose(word)
 
     def save_additional_corpora_for_evaluation(self, text_processor) -> None:
         pass
@@ -22,28 +22,52 @@ def run():
     train_dataset_path = get_run_params("SPLINTER_TRAINING_CORPUS_PATH")
     train_dataset_name = get_run_params("SPLINTER_TRAINING_CORPUS_NAME")
     letters_subset = get_run_params("SPLINTER_LETTERS_SUBSET")
+    n_workers = get_run_params("SPLINTER_N_WORKERS")
+    vectorized = get_run_params("SPLINTER_VECTORIZED")
+    edges_memory_limit_bytes = get_run_params("SPLINTER_EDGES_MEMORY_LIMIT_BYTES")
+    sample_token_mass = get_run_params("SPLINTER_SAMPLE_TOKEN_MASS")
 
     if get_run_params("SAVE_CORPORA_INTO_FILE"):
         if get_run_params("IS_ENCODED"):
             splinter_trainer = SplinterTrainer(language_utils)
             
-            # CORRECTED: Capture 3 values (reductions, map, and inverted_map)
-            reductions_map, new_unicode_chars_map, inverted_map = splinter_trainer.train(
-                train_dataset_path, train_dataset_name, letters_subset
-            )
+            incremental_dataset_name = get_run_params("SPLINTER_INCREMENTAL_CORPUS_NAME")
+            if incremental_dataset_name is not None:
+                delta_words_dict = splinter_trainer.get_word_dict(get_run_params("SPLINTER_INCREMENTAL_CORPUS_PATH"), incremental_dataset_name, n_workers)
+                training_state_path = get_run_params("SPLINTER_TRAINING_STATE_PATH")
+                training_state_path = training_state_path if training_state_path is not None else splinter_trainer.get_training_state_path()
+                reductions_map, new_unicode_chars_map, inverted_map = splinter_trainer.train_incremental(
+                    training_state_path, delta_words_dict, training_state_path
+                )
+            else:
+                # CORRECTED: Capture 3 values (reductions, map, and inverted_map)
+                reductions_map, new_unicode_chars_map, inverted_map = splinter_trainer.train(
+                    train_dataset_path, train_dataset_name, letters_subset, n_workers,
+                    save_training_state=get_run_params("SPLINTER_SAVE_TRAINING_STATE"), vectorized=vectorized,
+                    edges_memory_limit_bytes=edges_memory_limit_bytes, sample_token_mass=sample_token_mass,
+                    validate_vectorized=get_run_params("SPLINTER_VALIDATE_VECTORIZED")
+                )
 
             # CORRECTED: Pass 4 arguments (including inverted_map)
             text_processor = TextProcessorWithEncoding(
                 language_utils, 
                 reductions_map, 
                 new_unicode_chars_map, 
-                inverted_map
+                inverted_map,
+                word_cache_size=get_run_params("ENCODING_WORD_CACHE_SIZE"),
+                encoding_mode=get_run_params("ENCODING_MODE")
             )
         else:
             text_processor = TextProcessorBaseline(language_utils)
 
-        save_corpus_as_text_file(text_processor, train_dataset_path, train_dataset_name)
+        persistent_encoding_table = get_run_params("ENCODING_PERSISTENT_TABLE")
+        if persistent_encoding_table:
+            text_processor.load_encoding_table()
+        save_corpus_as_text_file(text_processor, train_dataset_path, train_dataset_name,
+                                 two_pass=get_run_params("ENCODING_TWO_PASS"), n_workers=get_run_params("ENCODING_N_WORKERS"))
         language_utils.save_additional_corpora_for_evaluation(text_processor)
+        if persistent_encoding_table:
+            text_processor.save_encoding_table()
 
     if get_run_params("TRAIN_TOKENIZERS"):
         tokenizer_corpus_path = get_corpus_path(get_corpus_name(train_dataset_path, train_dataset_name))
@@ -33,6 +33,33 @@ experiment_template = {
     # Use the Hugging Face path only
     'SPLINTER_TRAINING_CORPUS_PATH': 'amanuelbyte/Amharic_dataset', 
     "SPLINTER_TRAINING_CORPUS_NAME": "default",
+    # worker processes for mining the reductions of the word-length buckets (1 = no pool)
+    'SPLINTER_N_WORKERS': 1,
+    # find the reductions with the NumPy engine (same maps as the pure Python one)
+    'SPLINTER_VECTORIZED': False,
+    # debug: compare the deletions found by the NumPy engine with the pure Python ones, and fail if they differ
+    'SPLINTER_VALIDATE_VECTORIZED': False,
+    # memory for keeping the first pass deletions until the updating pass (None = no limit)
+    'SPLINTER_EDGES_MEMORY_LIMIT_BYTES': None,
+    # mine the reductions only from the words covering this share of every length token mass, e.g. 0.9 (None = all the words)
+    'SPLINTER_SAMPLE_TOKEN_MASS': None,
+    # save the training state, so a later run can update the reductions maps with new text instead of training again
+    'SPLINTER_SAVE_TRAINING_STATE': False,
+    # corpus of new text, whose words update the reductions maps of a saved training state (None = train on the training corpus)
+    'SPLINTER_INCREMENTAL_CORPUS_PATH': None,
+    'SPLINTER_INCREMENTAL_CORPUS_NAME': None,
+    # the training state updated with the incremental corpus, and saved again (None = the one of this experiment)
+    'SPLINTER_TRAINING_STATE_PATH': None,
+    # distinct words whose encoding is kept while encoding the corpora (least recently used are evicted)
+    'ENCODING_WORD_CACHE_SIZE': 1000000,
+    # encode the distinct words of the corpus first, by a pool of workers, then write the corpus by lookups
+    'ENCODING_TWO_PASS': False,
+    # worker processes encoding the corpora articles, and the distinct words in two-pass mode (1 = no pool)
+    'ENCODING_N_WORKERS': 1,
+    # beam search of the encoding: 'exact', 'balanced' or 'greedy' (faster, some words are segmented differently)
+    'ENCODING_MODE': 'exact',
+    # load the encodings persisted by earlier runs with the same reductions map, and persist the new ones
+    'ENCODING_PERSISTENT_TABLE': False,
     'TRAIN_TOKENIZERS': True,
     'TOKENIZERS_TYPES': ['unigram', 'bpe'],
     
@@ -11,7 +11,7 @@ sys.path.insert(0, 'src')
 # Monkey-patch the load_dataset function
 from datasets import load_dataset as original_load_dataset
 
-def patched_load_dataset(dataset_path, dataset_name, split="train", cache_dir=None):
+def patched_load_dataset(dataset_path, dataset_name, split="train", cache_dir=None, **kwargs):
     """Handle local text files."""
     print(f"Trying to load: path={dataset_path}, name={dataset_name}")
     
@@ -26,7 +26,7 @@ def patched_load_dataset(dataset_path, dataset_name, split="train", cache_dir=No
         return original_load_dataset("text", data_files=dataset_name, split=split, cache_dir=cache_dir)
     
     # Original behavior
-    return original_load_dataset(dataset_path, dataset_name, split=split, cache_dir=cache_dir)
+    return original_load_dataset(dataset_path, dataset_name, split=split, cache_dir=cache_dir, **kwargs)
 
 # Apply patch
 import src.SplinterTrainer
@@ -1,22 +1,52 @@
 import os
+import time
 from tqdm import tqdm
 from datasets import load_dataset
 
+from src.CorpusEncodingPipeline import CorpusEncodingPipeline, DEFAULT_QUEUE_DEPTH
 from src.TextProcessorInterface import TextProcessorInterface
 from src.logger import get_logger
 from src.utils.path_utils import get_raw_data_dir, delete_corpus_file_if_exists, get_corpus_path
 from src.utils.utils import get_corpus_name
 
 
-def save_corpus_as_text_file(text_processor: TextProcessorInterface, dataset_path: str, dataset_name: str, batch_size=10000):
+def save_corpus_as_text_file(text_processor: TextProcessorInterface, dataset_path: str, dataset_name: str, batch_size=10000,
+                             two_pass=False, n_workers=1, words=None, queue_depth=DEFAULT_QUEUE_DEPTH):
     """
     Save a corpus as a text file, supporting both local directories and Hugging Face datasets.
+    With two_pass, the distinct words of the corpus are collected first (or taken from words, the surface words of the corpus
+    as text_processor.get_words() splits them), and encoded once by n_workers processes, then the corpus is written by looking the words up.
+    The batches are read, encoded (by a pool of workers if n_workers > 1) and written concurrently by a CorpusEncodingPipeline,
+    holding at most queue_depth batches between the stages. The file is the same in every mode.
     """
     corpus_name = get_corpus_name(dataset_path, dataset_name)
     get_logger().info(f'Start saving {corpus_name} corpus as text file with {text_processor.__class__.__name__}')
 
     delete_corpus_file_if_exists(corpus_name)
 
+    if two_pass:
+        if words is None:
+            # an insertion-ordered set, so the encoding table is the same on every run
+            words = dict()
+            for dataset_batch in get_corpus_batches(dataset_path, dataset_name, batch_size):
+                for article_text in dataset_batch['text']:
+                    words.update(dict.fromkeys(text_processor.get_words(article_text)))
+        get_logger().info(f'Encoding {len(words)} distinct words of {corpus_name}')
+        text_processor.pre_encode_words(words, n_workers)
+
+    start = time.perf_counter()
+    pipeline = CorpusEncodingPipeline(text_processor, n_workers, queue_depth)
+    articles_number, words_number = pipeline.run(get_corpus_batches(dataset_path, dataset_name, batch_size), get_corpus_path(corpus_name))
+    seconds = time.perf_counter() - start
+
+    get_logger().info(f'Finished saving {corpus_name} corpus')
+    get_logger().info(f'{corpus_name}: {articles_number} articles and {words_number} words in {seconds:.1f}s with {n_workers} workers '
+                      f'({articles_number / max(seconds, 1e-9):.1f} articles/sec, {words_number / max(seconds, 1e-9):.1f} words/sec)')
+    # with a pool, the counters are those of the workers' caches, added up
+    log_cache_stats(text_processor)
+
+
+def get_corpus_batches(dataset_path: str, dataset_name: str, batch_size):
     if dataset_path.lower() == "local":
         # Local directory: read all .txt files
         if not os.path.exists(dataset_name):
@@ -30,31 +60,30 @@ def save_corpus_as_text_file(text_processor: TextProcessorInterface, dataset_pat
                     dataset_batch['text'].append("\n".join([line.strip() for line in f]))
                     # Process in batches if needed
                     if len(dataset_batch['text']) >= batch_size:
-                        process_batch(text_processor, dataset_batch, corpus_name)
+                        yield dataset_batch
                         dataset_batch = {'text': []}
         # Process remaining texts
         if dataset_batch['text']:
-            process_batch(text_processor, dataset_batch, corpus_name)
+            yield dataset_batch
 
     else:
         # Hugging Face dataset
         dataset = load_dataset(dataset_path, dataset_name, split="train", cache_dir=get_raw_data_dir())
         for i, j in enumerate(tqdm(range(0, len(dataset), batch_size))):
-            dataset_batch = {'text': [dataset[k]['text'] for k in range(j, min(j + batch_size, len(dataset)))]}
-            process_batch(text_processor, dataset_batch, corpus_name)
+            yield {'text': [dataset[k]['text'] for k in range(j, min(j + batch_size, len(dataset)))]}
 
-    get_logger().info(f'Finished saving {corpus_name} corpus')
+
+def log_cache_stats(text_processor: TextProcessorInterface):
+    for cache_name, cache_stats in text_processor.get_cache_stats().items():
+        get_logger().info(f'{text_processor.__class__.__name__} {cache_name} cache: {cache_stats}')
 
 
 def get_all_files_in_dir(directory):
     return [os.path.join(root, file) for root, _, files in os.walk(directory) for file in files]
 
 
-def process_batch(text_processor, dataset_batch, corpus_name):
-    encoded_articles_list = []
-    for article_text in dataset_batch["text"]:
-        encoded_article = text_processor.process(article_text)
-        encoded_articles_list.append(encoded_article)
+def process_batch(text_processor, dataset_batch, corpus_name, n_workers=1, pool=None):
+    encoded_articles_list = text_processor.process_batch(dataset_batch["text"], n_workers, pool)
     with open(get_corpus_path(corpus_name), 'a', encoding='utf-8') as file:
         file.write("\n".join(encoded_articles_list) + "\n")
 
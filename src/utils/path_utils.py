@@ -12,6 +12,9 @@ def get_words_dict_dir():
         os.makedirs(path, exist_ok=True)
     return path
 
+def get_cache_dir():
+    return './data/cache'
+
 def get_logs_dir():
     return f'./experiments/{get_run_params("EXPERIMENT_NAME")}/logs/log-{get_run_params("TASK_ID")}-{get_run_params("TIMESTAMP")}'
 
@@ -1,6 +1,9 @@
 import json
+import os
 import re
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+from src.logger import get_logger
 from src.utils.path_utils import get_splinter_dir, get_logs_dir
 
 def get_words_dict_by_length(words_dict):
@@ -19,6 +22,43 @@ def get_corpus_name(dataset_path, dataset_name):
     name = dataset_name.replace('\\', '/').split('/')[-1]
     return name.replace('.txt', '').replace('.', '_')
 
+def get_local_files_fingerprint(dataset_path, dataset_name):
+    """Lists size and modification time of the corpus files, when the corpus is on the local disk."""
+    fingerprint = []
+    for path in (dataset_path, dataset_name):
+        if path is None or not os.path.exists(path):
+            continue
+        files = [path] if os.path.isfile(path) else sorted(os.path.join(root, file) for root, _, dir_files in os.walk(path) for file in dir_files)
+        for file in files:
+            file_stat = os.stat(file)
+            fingerprint.append([file, file_stat.st_size, file_stat.st_mtime_ns])
+    return fingerprint
+
+def imap_bounded(pool, func, tasks, max_pending_tasks):
+    """Like pool.imap, but the next task is read only when a result is taken, so a stream of tasks is never loaded ahead."""
+    # at most max_pending_tasks tasks are read and their results not taken yet, the results come in the tasks order
+    pending_results = deque()
+    for task in tasks:
+        pending_results.append(pool.apply_async(func, (task,)))
+        if len(pending_results) >= max_pending_tasks:
+            yield pending_results.popleft().get()
+    while pending_results:
+        yield pending_results.popleft().get()
+
+@lru_cache(maxsize=None)
+def get_hub_dataset_revision(dataset_path, dataset_name):
+    """The commit of a Hugging Face Hub dataset, or None for a local corpus or, with a warning, when it can't be resolved."""
+    if dataset_path.lower() in ('local', 'text') or get_local_files_fingerprint(dataset_path, dataset_name):
+        return None
+    try:
+        from huggingface_hub import HfApi
+        return HfApi().dataset_info(dataset_path).sha
+    except Exception as error:
+        # e.g. offline. the cache key has no revision then, so it can miss the entries of the runs that resolved it
+        get_logger().warning(f"The revision of the Hub dataset {dataset_path} can't be resolved ({error.__class__.__name__}: {error}), "
+                             f"its cached artifacts are keyed without it")
+        return None
+
 def add_static_result_to_file(result):
     with open(f'{get_logs_dir()}/static_checks_results.json', 'a', encoding='utf-8') as file:
         file.write('\n')
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logger import initialize_logger
+from src.params import set_run_params, get_dummy_experiment
+from src.utils.path_utils import create_experiment_dirs
+
+TESTS_EXPERIMENT_NAME = 'tests'
+
+
+@pytest.fixture(scope='session', autouse=True)
+def experiment_dirs(tmp_path_factory):
+    # the experiment and cache dirs are relative to the working directory, so the tests run in a temporary one
+    working_dir = tmp_path_factory.mktemp('experiment')
+    previous_working_dir = os.getcwd()
+    os.chdir(working_dir)
+    experiment = get_dummy_experiment(TESTS_EXPERIMENT_NAME)
+    set_run_params(experiment)
+    create_experiment_dirs()
+    initialize_logger()
+    yield working_dir
+    os.chdir(previous_working_dir)
+
+
+def get_encoding_maps(language, reductions_letters, max_length=8):
+    # (language utils, reductions map, new chars map, inverted map) of every position of a few letters, in a fixed order.
+    # -1 is left out like in a trained map, where get_permutation never reduces a word at it
+    from src.SplinterTrainer import SplinterTrainer
+    from src.language_utils.LanguageUtilsFactory import LanguageUtilsFactory
+    language_utils = LanguageUtilsFactory.get_by_language(language)
+    splinter_trainer = SplinterTrainer(language_utils)
+    reductions_map = splinter_trainer.initialize_reductions_dict(max_length)
+    for word_length in range(4, max_length + 1):
+        length_reductions = [f'{position}:{letter}' for letter in reductions_letters
+                             for position in splinter_trainer.get_position_range_including_negative_indexes('x' * word_length)
+                             if position != -1]
+        reductions_map[word_length] = {reduction: 1 / (rank + 2) for rank, reduction in enumerate(length_reductions)}
+    new_unicode_chars_map = splinter_trainer.map_reductions_to_new_chars(reductions_map)
+    new_unicode_chars_inverted_map = {new_char: reduction for reduction, new_char in new_unicode_chars_map.items()}
+    return language_utils, reductions_map, new_unicode_chars_map, new_unicode_chars_inverted_map
+
+
+@pytest.fixture(scope='session')
+def hebrew_encoding_maps():
+    return get_encoding_maps('he', 'והימל')
+
+
+@pytest.fixture(scope='session')
+def geez_encoding_maps():
+    # the vowel markers and a few base consonants, the letters of the decomposed words
+    return get_encoding_maps('gez', ['\uE001', '\uE002', '\uE004', 'በ', 'ሰ', 'መ'], max_length=12)
+
+
+@pytest.fixture(scope='session')
+def hebrew_texts():
+    # articles of a few lines of random Hebrew words, many of them repeated
+    random_generator = random.Random(11)
+    alphabet = [chr(code_point) for code_point in range(0x05D0, 0x05EA + 1)]
+    vocabulary = [''.join(random_generator.choices(alphabet, k=random_generator.randint(2, 9))) for _ in range(300)]
+    return ['\n'.join(' '.join(random_generator.choices(vocabulary, k=random_generator.randint(3, 12))) + '.'
+                      for _ in range(random_generator.randint(1, 4)))
+            for _ in range(40)]
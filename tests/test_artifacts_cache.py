@@ -0,0 +1,56 @@
+import time
+
+from src.ArtifactsCache import ArtifactsCache
+
+ENTRY_SIZE_BYTES = 1000
+
+
+def publish_entry(artifacts_cache, name, last_access=None):
+    # an entry of a single file of ENTRY_SIZE_BYTES, last used at last_access
+    key = ArtifactsCache.get_key(artifact=name)
+    staging_path = artifacts_cache.get_staging_path(key)
+    with open(f'{staging_path}/data', 'wb') as file:
+        file.write(b'x' * ENTRY_SIZE_BYTES)
+    entry_path = artifacts_cache.publish(key, name)
+    if last_access is not None:
+        meta = artifacts_cache.read_meta(entry_path)
+        meta['last_access'] = last_access
+        artifacts_cache.write_meta(entry_path, meta)
+    return key
+
+
+def test_least_recently_used_entries_are_evicted_over_the_max_size(tmp_path):
+    # room for 3 entries with their meta files
+    artifacts_cache = ArtifactsCache(str(tmp_path / 'cache'), max_size_bytes=3 * ENTRY_SIZE_BYTES + 1000)
+    now = time.time()
+    first_key = publish_entry(artifacts_cache, 'first', now - 30)
+    second_key = publish_entry(artifacts_cache, 'second', now - 20)
+    third_key = publish_entry(artifacts_cache, 'third', now - 10)
+    assert artifacts_cache.get(first_key) is not None
+
+    fourth_key = publish_entry(artifacts_cache, 'fourth')
+
+    assert artifacts_cache.get(second_key) is None
+    for key in (first_key, third_key, fourth_key):
+        assert artifacts_cache.get(key) is not None
+
+
+def test_entries_unused_for_max_age_are_evicted(tmp_path):
+    artifacts_cache = ArtifactsCache(str(tmp_path / 'cache'), max_age_days=1)
+    old_key = publish_entry(artifacts_cache, 'old', time.time() - 2 * 24 * 60 * 60)
+    recent_key = publish_entry(artifacts_cache, 'recent', time.time() - 60 * 60)
+
+    new_key = publish_entry(artifacts_cache, 'new')
+
+    assert artifacts_cache.get(old_key) is None
+    assert artifacts_cache.get(recent_key) is not None
+    assert artifacts_cache.get(new_key) is not None
+
+
+def test_the_published_entry_is_kept_when_it_is_over_the_max_size(tmp_path):
+    artifacts_cache = ArtifactsCache(str(tmp_path / 'cache'), max_size_bytes=ENTRY_SIZE_BYTES // 2)
+    first_key = publish_entry(artifacts_cache, 'first')
+    second_key = publish_entry(artifacts_cache, 'second')
+
+    assert artifacts_cache.get(first_key) is None
+    assert artifacts_cache.get(second_key) is not None
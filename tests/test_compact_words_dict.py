@@ -0,0 +1,109 @@
+import random
+
+import numpy as np
+import pytest
+
+import src.CompactWordsDict as compact_words_dict_module
+from src.CompactWordsDict import CompactWordsDict
+
+# user-005: CompactWordsDict saved, loaded back and updated on disk, with int and float counts
+
+
+def get_words_dict_fixture(words_number=2000, seed=5, is_float=False):
+    # Hebrew, Ge'ez and new unicode chars words, so the words blob has 2 and 3 bytes chars, of 1-9 letters
+    random_generator = random.Random(seed)
+    letters = 'אבגדהוזחטיכלמנ' + 'ሀለሐመሠረሰ' + '倀倁'
+    words = dict()
+    while len(words) < words_number:
+        word = ''.join(random_generator.choices(letters, k=random_generator.randint(1, 9)))
+        words[word] = random_generator.uniform(0.5, 100) if is_float else random_generator.randint(1, 1000)
+    return words
+
+
+def save_and_open(words_dict, path):
+    CompactWordsDict.save(words_dict, str(path))
+    return CompactWordsDict(str(path))
+
+
+def assert_same_words_dict(compact_words_dict, words_dict):
+    assert len(compact_words_dict) == len(words_dict)
+    assert compact_words_dict.to_dict() == words_dict
+    # iterated by (length, word), whatever the order of the saved dict
+    assert list(compact_words_dict) == sorted(words_dict, key=lambda word: (len(word), word))
+    assert compact_words_dict.get_lengths() == sorted({len(word) for word in words_dict})
+    for word, count in words_dict.items():
+        assert word in compact_words_dict
+        assert compact_words_dict[word] == count
+        assert type(compact_words_dict[word]) is type(count)
+
+
+@pytest.mark.parametrize('is_float', [False, True])
+def test_saved_words_dict_is_loaded_back(tmp_path, is_float):
+    words_dict = get_words_dict_fixture(is_float=is_float)
+    compact_words_dict = save_and_open(words_dict, tmp_path / 'words')
+
+    assert_same_words_dict(compact_words_dict, words_dict)
+    assert compact_words_dict.counts.dtype == (np.float64 if is_float else np.int64)
+    for missing_word in ('', 'אבגדהוזחטי', 'ab'):
+        assert missing_word not in compact_words_dict
+        assert compact_words_dict.get(missing_word, -1) == -1
+        with pytest.raises(KeyError):
+            compact_words_dict[missing_word]
+    compact_words_dict.close()
+
+
+def test_float_counts_are_kept_with_int_counts(tmp_path):
+    words_dict = {'אב': 3, 'אבג': 2.5, 'ሀለ': 7}
+    compact_words_dict = save_and_open(words_dict, tmp_path / 'words')
+
+    assert compact_words_dict.counts.dtype == np.float64
+    assert compact_words_dict.to_dict() == {'אב': 3.0, 'אבג': 2.5, 'ሀለ': 7.0}
+    compact_words_dict.close()
+
+
+def test_empty_words_dict(tmp_path):
+    compact_words_dict = save_and_open(dict(), tmp_path / 'words')
+
+    assert_same_words_dict(compact_words_dict, dict())
+    assert compact_words_dict.get('אב') is None
+    assert compact_words_dict.search_word('אב') == (0, False)
+    assert list(compact_words_dict.get_items_with_min_count(0)) == list()
+
+    CompactWordsDict.save_updated(compact_words_dict, {'אב': 1, 'ሀለሐ': 2}, str(tmp_path / 'updated'))
+    assert CompactWordsDict(str(tmp_path / 'updated')).to_dict() == {'אב': 1, 'ሀለሐ': 2}
+    compact_words_dict.close()
+
+
+@pytest.mark.parametrize('is_float, is_float_update', [(False, False), (False, True), (True, False)])
+def test_updated_words_dict_is_the_saved_merged_dict(tmp_path, is_float, is_float_update):
+    words_dict = get_words_dict_fixture(is_float=is_float)
+    compact_words_dict = save_and_open(words_dict, tmp_path / 'words')
+    # changed counts, and new words of every length, including lengths the dict doesn't have yet
+    random_generator = random.Random(6)
+    updated_words = {word: words_dict[word] + 1 for word in random_generator.sample(sorted(words_dict), 200)}
+    new_words = get_words_dict_fixture(words_number=300, seed=8, is_float=is_float_update)
+    updated_words.update({word: count for word, count in new_words.items() if word not in words_dict})
+    updated_words.update({'ב' * 12: 5, 'ሀ' * 10: 6})
+    if is_float_update:
+        updated_words = {word: float(count) for word, count in updated_words.items()}
+
+    CompactWordsDict.save_updated(compact_words_dict, updated_words, str(tmp_path / 'updated'))
+    updated_compact_words_dict = CompactWordsDict(str(tmp_path / 'updated'))
+
+    assert_same_words_dict(updated_compact_words_dict, {word: float(count) if is_float or is_float_update else count
+                                                        for word, count in {**words_dict, **updated_words}.items()})
+    compact_words_dict.close()
+    updated_compact_words_dict.close()
+
+
+@pytest.mark.parametrize('is_float', [False, True])
+def test_items_with_min_count_are_the_filtered_items(tmp_path, monkeypatch, is_float):
+    # small chunks, so the length buckets are filtered in several chunks
+    monkeypatch.setattr(compact_words_dict_module, 'ITERATION_CHUNK_SIZE', 64)
+    words_dict = get_words_dict_fixture(is_float=is_float)
+    compact_words_dict = save_and_open(words_dict, tmp_path / 'words')
+
+    for min_count in (0, 1, 50, 999.5, 2000):
+        assert list(compact_words_dict.get_items_with_min_count(min_count)) == \
+               [(word, count) for word, count in compact_words_dict.items() if count >= min_count]
+    compact_words_dict.close()
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+from datasets import Dataset
+
+from src.CorpusWordsExtractor import CorpusWordsExtractor
+from src.language_utils.HebrewUtils import HebrewUtils
+
+ARTICLES_NUMBER = 3000
+CHECKPOINT_EVERY = 1000
+
+
+class CountingInterrupted(Exception):
+    pass
+
+
+def get_articles_fixture(seed=3):
+    # short articles of random Hebrew words, more than the chunks of a few checkpoints
+    random_generator = random.Random(seed)
+    vocabulary = [''.join(random_generator.choices('אבגדהוזחטיכלמנסעפצקרשת', k=random_generator.randint(2, 7))) for _ in range(2000)]
+    return [' '.join(random_generator.choices(vocabulary, k=random_generator.randint(1, 8))) for _ in range(ARTICLES_NUMBER)]
+
+
+def get_corpus(articles, corpus_type):
+    # a new corpus every time, so a resumed run reads a stream from its start, like after a restart
+    if corpus_type == 'iterator':
+        return iter([{'text': article} for article in articles])
+    dataset = Dataset.from_dict({'text': articles})
+    return dataset if corpus_type == 'dataset' else dataset.to_iterable_dataset()
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+@pytest.mark.parametrize('corpus_type', ['dataset', 'iterable_dataset', 'iterator'])
+def test_interrupted_counting_resumes_to_the_same_words(tmp_path, monkeypatch, corpus_type, n_workers):
+    articles = get_articles_fixture()
+    expected_words = CorpusWordsExtractor(HebrewUtils()).get_words_from_corpus(get_corpus(articles, 'iterator'))
+
+    # the job is stopped right after its second checkpoint
+    checkpoints_articles_read = list()
+    save_checkpoint = CorpusWordsExtractor.save_checkpoint
+
+    def save_checkpoint_and_stop(checkpoint_path, words, articles_read):
+        save_checkpoint(checkpoint_path, words, articles_read)
+        checkpoints_articles_read.append(articles_read)
+        if len(checkpoints_articles_read) == 2:
+            raise CountingInterrupted()
+
+    checkpoint_path = str(tmp_path / 'words.json.checkpoint')
+    monkeypatch.setattr(CorpusWordsExtractor, 'save_checkpoint', staticmethod(save_checkpoint_and_stop))
+    with pytest.raises(CountingInterrupted):
+        CorpusWordsExtractor(HebrewUtils()).get_words_from_corpus(get_corpus(articles, corpus_type), n_workers, checkpoint_path,
+                                                                  CHECKPOINT_EVERY)
+    monkeypatch.setattr(CorpusWordsExtractor, 'save_checkpoint', staticmethod(save_checkpoint))
+
+    assert CorpusWordsExtractor.load_checkpoint(checkpoint_path)[1] == checkpoints_articles_read[-1] < ARTICLES_NUMBER
+    words = CorpusWordsExtractor(HebrewUtils()).get_words_from_corpus(get_corpus(articles, corpus_type), n_workers, checkpoint_path,
+                                                                      CHECKPOINT_EVERY)
+    assert words == expected_words
+    assert list(words) == list(expected_words)
+
+
+@pytest.mark.parametrize('corpus_type', ['dataset', 'iterable_dataset', 'iterator'])
+def test_pool_counts_the_sequential_words(corpus_type):
+    articles = get_articles_fixture()
+    expected_words = CorpusWordsExtractor(HebrewUtils()).get_words_from_corpus(get_corpus(articles, corpus_type))
+
+    words = CorpusWordsExtractor(HebrewUtils()).get_words_from_corpus(get_corpus(articles, corpus_type), n_workers=2)
+    assert words == expected_words
+    assert list(words) == list(expected_words)
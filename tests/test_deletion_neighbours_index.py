@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from src.DeletionNeighboursIndex import DeletionNeighboursIndex
+from src.VectorizedDeletionNeighboursIndex import VectorizedDeletionNeighboursIndex
+from src.utils.utils import get_words_dict_by_length
+
+WORD_LENGTHS = range(4, 8)
+
+
+def get_words_dict_by_length_fixture(words_number=3000, seed=7):
+    # words of 3-7 letters of a small alphabet, so most of them have shorter words one deletion away
+    random_generator = random.Random(seed)
+    words = dict()
+    while len(words) < words_number:
+        word = ''.join(random_generator.choices('abcd', k=random_generator.randint(3, 7)))
+        words[word] = random_generator.randint(10, 1000)
+    return get_words_dict_by_length(words)
+
+
+def test_lengths_over_the_memory_limit_are_recomputed():
+    words_dict_by_length = get_words_dict_by_length_fixture()
+    full_index = DeletionNeighboursIndex(words_dict_by_length)
+    full_index.build_all_lengths(WORD_LENGTHS)
+    # room for the shortest lengths only
+    limited_index = DeletionNeighboursIndex(words_dict_by_length, max_memory_bytes=full_index.memory_bytes // 3)
+    limited_index.build_all_lengths(WORD_LENGTHS, shard_size=100)
+
+    assert limited_index.memory_bytes <= limited_index.max_memory_bytes
+    skipped_lengths = [word_length for word_length in WORD_LENGTHS if word_length not in limited_index.compact_edges_by_length]
+    assert len(skipped_lengths) > 0
+    for word_length in WORD_LENGTHS:
+        assert limited_index.count_length_reductions(word_length) == full_index.count_length_reductions(word_length)
+        assert list(limited_index.get_length_words_edges(word_length)) == list(full_index.get_length_words_edges(word_length))
+
+
+@pytest.mark.parametrize('max_memory_bytes', [None, 0])
+def test_pool_builds_the_same_index(max_memory_bytes):
+    words_dict_by_length = get_words_dict_by_length_fixture()
+    index = DeletionNeighboursIndex(words_dict_by_length, max_memory_bytes=max_memory_bytes)
+    index.build_all_lengths(WORD_LENGTHS)
+    pool_index = DeletionNeighboursIndex(words_dict_by_length, max_memory_bytes=max_memory_bytes)
+    pool_index.build_all_lengths(WORD_LENGTHS, n_workers=2, shard_size=100)
+
+    assert pool_index.reduction_counts_by_length == index.reduction_counts_by_length
+    for word_length in WORD_LENGTHS:
+        assert pool_index.get_length_edges(word_length) == index.get_length_edges(word_length)
+
+
+@pytest.mark.parametrize('letters_for_reductions', [None, ['a', 'c']])
+def test_vectorized_index_has_the_python_edges(letters_for_reductions):
+    words_dict_by_length = get_words_dict_by_length_fixture()
+    index = DeletionNeighboursIndex(words_dict_by_length, letters_for_reductions)
+    vectorized_index = VectorizedDeletionNeighboursIndex(words_dict_by_length, letters_for_reductions)
+
+    for word_length in WORD_LENGTHS:
+        assert vectorized_index.get_length_edges(word_length) == index.get_length_edges(word_length)
+        assert vectorized_index.count_length_reductions(word_length) == index.count_length_reductions(word_length)
+    vectorized_index.validate(WORD_LENGTHS)
@@ -0,0 +1,92 @@
+import random
+
+import numpy as np
+
+from src.ArtifactsCache import ArtifactsCache
+from src.EncodingTable import EncodingTable
+from src.TextProcessorWithEncoding import TextProcessorWithEncoding
+
+# user-017: EncodingTable saved and loaded back, and updated with new words through the artifacts cache
+
+
+def get_encoded_words_fixture(words_number=2000, seed=3):
+    # Hebrew and Ge'ez words encoded to new unicode chars, some of them kept as they are or encoded to nothing
+    random_generator = random.Random(seed)
+    letters = 'אבגדהוזחטיכלמנ' + 'ሀለሐመሠረሰ'
+    new_chars = [chr(code) for code in range(0x5000, 0x5010)]
+    encoded_words = dict()
+    while len(encoded_words) < words_number:
+        word = ''.join(random_generator.choices(letters, k=random_generator.randint(1, 9)))
+        encoded_words[word] = random_generator.choice([
+            word,
+            '',
+            ''.join(random_generator.choices(new_chars + list(letters), k=random_generator.randint(1, len(word)))),
+        ])
+    return encoded_words
+
+
+def save_and_open(encoded_words, path):
+    EncodingTable.save(encoded_words, str(path))
+    return EncodingTable(str(path))
+
+
+def test_saved_table_is_loaded_back(tmp_path):
+    encoded_words = get_encoded_words_fixture()
+    encoding_table = save_and_open(encoded_words, tmp_path / 'table')
+
+    assert len(encoding_table) == len(encoded_words)
+    assert dict(encoding_table.items()) == encoded_words
+    for word, encoded_word in encoded_words.items():
+        assert word in encoding_table
+        assert encoding_table.get(word) == encoded_word
+    # the words are indexes into the encoded words, never float counts
+    assert encoding_table.words.counts.dtype == np.int64
+    assert sorted(encoding_table.words.values()) == list(range(len(encoded_words)))
+    for missing_word in ('', 'אבגדהוזחטי', 'ab'):
+        assert missing_word not in encoding_table
+        assert encoding_table.get(missing_word) is None
+        assert encoding_table.get(missing_word, missing_word) == missing_word
+    encoding_table.close()
+
+
+def test_empty_table(tmp_path):
+    encoding_table = save_and_open(dict(), tmp_path / 'table')
+
+    assert len(encoding_table) == 0
+    assert dict(encoding_table.items()) == dict()
+    assert encoding_table.get('אב') is None
+    encoding_table.close()
+
+    # a table of only empty encoded words has an empty blob too
+    encoding_table = save_and_open({'אב': '', 'ሀለ': ''}, tmp_path / 'empty_encoded_words')
+    assert dict(encoding_table.items()) == {'אב': '', 'ሀለ': ''}
+    encoding_table.close()
+
+
+def test_saved_table_is_updated_with_the_new_encoded_words(tmp_path, hebrew_encoding_maps, hebrew_texts):
+    artifacts_cache = ArtifactsCache(str(tmp_path / 'cache'))
+    first_texts, second_texts = hebrew_texts[:20], hebrew_texts[20:]
+    text_processor = TextProcessorWithEncoding(*hebrew_encoding_maps)
+    assert not text_processor.load_encoding_table(artifacts_cache)
+    for text in first_texts:
+        text_processor.process(text)
+    first_encoded_words = dict(text_processor.new_encoded_words)
+    assert len(first_encoded_words) > 0
+    text_processor.save_encoding_table(artifacts_cache)
+
+    # a new processor starts from the saved table, and adds only the words it encoded itself
+    text_processor = TextProcessorWithEncoding(*hebrew_encoding_maps)
+    assert text_processor.load_encoding_table(artifacts_cache)
+    assert dict(text_processor.encoding_table.items()) == first_encoded_words
+    for text in second_texts:
+        text_processor.process(text)
+    assert not set(text_processor.new_encoded_words) & set(first_encoded_words)
+    second_encoded_words = dict(text_processor.new_encoded_words)
+    text_processor.save_encoding_table(artifacts_cache)
+
+    text_processor = TextProcessorWithEncoding(*hebrew_encoding_maps)
+    assert text_processor.load_encoding_table(artifacts_cache)
+    assert dict(text_processor.encoding_table.items()) == {**first_encoded_words, **second_encoded_words}
+    encoding_processor = TextProcessorWithEncoding(*hebrew_encoding_maps)
+    for word, encoded_word in text_processor.encoding_table.items():
+        assert encoded_word == encoding_processor.encode_word(word)
@@ -0,0 +1,199 @@
+import random
+
+import pytest
+
+from src.ArtifactsCache import ArtifactsCache
+from src.CompactWordsDict import CompactWordsDict
+from src.SplinterTrainer import SplinterTrainer
+from src.SplinterTrainingState import SplinterTrainingState
+from src.language_utils.HebrewUtils import HebrewUtils
+from src.language_utils.geez_utils import GeezUtils
+from src.utils.utils import get_words_dict_by_length, get_permutation, get_hub_dataset_revision
+
+
+class FinalLettersMergingUtils(HebrewUtils):
+    # replaces the final forms by the regular letters, so a word and its misspelling with a final letter collide
+    FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+
+    def replace_final_letters(self, text: str) -> str:
+        return text.translate(self.FINAL_LETTERS)
+
+
+def test_filter_words_merges_colliding_words_in_any_order():
+    splinter_trainer = SplinterTrainer(FinalLettersMergingUtils())
+    words_counts = [('שלום', 30), ('שלומ', 12), ('ספר', 20), ('ילד', 3)]
+
+    filtered_words = splinter_trainer.filter_words(words_counts)
+    reversed_filtered_words = splinter_trainer.filter_words(list(reversed(words_counts)))
+
+    assert filtered_words == reversed_filtered_words == {'שלומ': 42, 'ספר': 20}
+    assert splinter_trainer.filter_drop_counts['merged_final_letters'] == 1
+
+
+def get_words_counts_fixture(words_number=3000, seed=5):
+    # words of a few Hebrew letters, so most of them have shorter words one deletion away
+    random_generator = random.Random(seed)
+    words_counts = dict()
+    while len(words_counts) < words_number:
+        word = ''.join(random_generator.choices('אבגדהול', k=random_generator.randint(2, 7)))
+        words_counts[word] = random_generator.randint(1, 500)
+    return words_counts
+
+
+def get_geez_words_counts_fixture(words_number=1500, seed=5):
+    # syllables of a few consonants, which decompose into 2 letters, and a few words with an 8th order syllable, which
+    # decomposes into 1 letter. So the decomposed words have lengths 4, 5, 6 and 8 only, and 4, 7 and 8 aren't reduced
+    random_generator = random.Random(seed)
+    syllables = [chr(consonant + order) for consonant in (0x1260, 0x1230, 0x1218, 0x1208) for order in range(7)]
+    words_counts = dict()
+    while len(words_counts) < words_number:
+        syllables_number = random_generator.choice([2, 2, 3, 4])
+        word = ''.join(random_generator.choices(syllables, k=syllables_number))
+        if syllables_number == 2 and random_generator.random() < 0.5:
+            word = '\u1267' + word
+        words_counts[word] = random_generator.randint(1, 500)
+    return words_counts
+
+
+def split_words_counts(words_counts, new_words_share, seed=6):
+    # (base, delta) whose sum is words_counts: the delta has new words, and more occurrences of base words
+    random_generator = random.Random(seed)
+    base, delta = dict(), dict()
+    for word, count in words_counts.items():
+        share = random_generator.random()
+        if share < new_words_share:
+            delta[word] = count
+        elif share < 0.1 + new_words_share and count > 1:
+            delta[word] = random_generator.randint(1, count - 1)
+            base[word] = count - delta[word]
+        else:
+            base[word] = count
+    return base, delta
+
+
+def cache_words_dict(splinter_trainer, dataset_name, words_counts):
+    # as if the words dict of the corpus was counted by an earlier run
+    words_dict_key = splinter_trainer.get_words_dict_key('local', dataset_name)
+    staging_path = splinter_trainer.artifacts_cache.get_staging_path(words_dict_key)
+    CompactWordsDict.save(words_counts, f'{staging_path}/{SplinterTrainer.WORDS_DICT_DIR_NAME}')
+    splinter_trainer.artifacts_cache.publish(words_dict_key, dataset_name)
+
+
+@pytest.mark.parametrize('language_utils_class, new_words_share, is_max_count_in_delta',
+                         [(HebrewUtils, 0.05, False), (HebrewUtils, 0, False), (HebrewUtils, 0.05, True),
+                          (GeezUtils, 0.05, False), (GeezUtils, 0.05, True)])
+def test_incremental_training_is_a_full_retrain(tmp_path, language_utils_class, new_words_share, is_max_count_in_delta):
+    words_counts = get_words_counts_fixture() if language_utils_class is HebrewUtils else get_geez_words_counts_fixture()
+    base, delta = split_words_counts(words_counts, new_words_share)
+    most_frequent_word = max(words_counts, key=words_counts.get)
+    words_counts[most_frequent_word] = 1000
+    # the max word count normalizes all the scores, raising it makes the incremental training reduce all the words again
+    base[most_frequent_word] = words_counts[most_frequent_word] - (100 if is_max_count_in_delta else 0)
+    delta.pop(most_frequent_word, None)
+    if is_max_count_in_delta:
+        delta[most_frequent_word] = 100
+    splinter_trainer = SplinterTrainer(language_utils_class(), ArtifactsCache(str(tmp_path / 'cache')))
+    cache_words_dict(splinter_trainer, 'full', words_counts)
+    cache_words_dict(splinter_trainer, 'base', base)
+
+    full_reductions_map, _, _ = splinter_trainer.train('local', 'full')
+    splinter_trainer.train('local', 'base', save_training_state=True)
+    training_state_path = str(tmp_path / 'training_state')
+    reductions_map, new_unicode_chars_map, _ = splinter_trainer.train_incremental(splinter_trainer.get_training_state_path(), delta,
+                                                                                  training_state_path)
+
+    assert reductions_map == full_reductions_map
+    assert [list(length_reductions) for length_reductions in reductions_map.values()] == \
+           [list(length_reductions) for length_reductions in full_reductions_map.values()]
+    assert set(new_unicode_chars_map) == set(reduction for length_reductions in reductions_map.values() for reduction in length_reductions)
+    training_state = SplinterTrainingState.load(training_state_path)
+    assert training_state.words_counts.to_dict() == words_counts
+
+
+def get_baseline_reduction(word, reductions, previous_length_words, max_number_of_candidates):
+    # the per-word reduction of the original trainer: the reductions map is scanned in order for every word
+    word_length = len(word)
+    possible_reductions = list()
+    if word_length > 3:
+        if word_length not in reductions:
+            return None
+        for reduction, reduction_score in reductions[word_length].items():
+            position, letter = reduction.split(':')
+            position = int(position)
+            if word[position] == letter:
+                permutation = get_permutation(word, position, word_length)
+                if permutation in previous_length_words:
+                    possible_reductions.append({"reduction": reduction, "score": reduction_score * previous_length_words[permutation]})
+                    if len(possible_reductions) >= max_number_of_candidates:
+                        break
+    if len(possible_reductions) == 0:
+        return None
+    return max(possible_reductions, key=lambda x: x["score"])
+
+
+def get_baseline_reductions_map(splinter_trainer, words_counts, letters_for_reductions):
+    # the reductions map of the original trainer, which probed every position of every word in both passes
+    words_dict_by_length = get_words_dict_by_length(splinter_trainer.pre_process_words(words_counts))
+    max_length = max(words_dict_by_length.keys())
+    reductions = splinter_trainer.initialize_reductions_dict(max_length)
+    for word_length in range(4, max_length + 1):
+        if word_length not in words_dict_by_length or (word_length - 1) not in words_dict_by_length:
+            continue
+        for word in words_dict_by_length[word_length]:
+            for position in splinter_trainer.get_position_range_including_negative_indexes(word):
+                if letters_for_reductions is None or word[position] in letters_for_reductions:
+                    if get_permutation(word, position, word_length) in words_dict_by_length[word_length - 1]:
+                        splinter_trainer.increment_value(reductions[word_length], f"{position}:{word[position]}")
+        reductions[word_length] = splinter_trainer.normalize_values(splinter_trainer.sort_dictionary(reductions[word_length]))
+
+    updated_reductions = splinter_trainer.initialize_reductions_dict(max_length)
+    for word_length in range(4, max_length + 1):
+        if word_length not in words_dict_by_length or (word_length - 1) not in words_dict_by_length:
+            continue
+        current_length_words = words_dict_by_length[word_length]
+        for word, score in list(current_length_words.items()):
+            reduction_with_score = get_baseline_reduction(word, reductions, words_dict_by_length[word_length - 1], 3)
+            if reduction_with_score is not None:
+                splinter_trainer.increment_value(updated_reductions[word_length], reduction_with_score['reduction'])
+                current_length_words[word] = score * reduction_with_score['score']
+        updated_reductions[word_length] = splinter_trainer.normalize_values(splinter_trainer.sort_dictionary(updated_reductions[word_length]))
+        if len(updated_reductions[word_length]) == 0:
+            del updated_reductions[word_length]
+    return updated_reductions
+
+
+@pytest.mark.parametrize('letters_for_reductions', [None, ['ו', 'ה', 'ל']])
+def test_compiled_reductions_are_the_baseline_ones(tmp_path, letters_for_reductions):
+    words_counts = get_words_counts_fixture()
+    splinter_trainer = SplinterTrainer(HebrewUtils(), ArtifactsCache(str(tmp_path / 'cache')))
+    cache_words_dict(splinter_trainer, 'corpus', words_counts)
+
+    reductions_map, _, _ = splinter_trainer.train('local', 'corpus', letters_for_reductions)
+
+    baseline_reductions_map = get_baseline_reductions_map(splinter_trainer, words_counts, letters_for_reductions)
+    assert reductions_map == baseline_reductions_map
+    assert [list(length_reductions) for length_reductions in reductions_map.values()] == \
+           [list(length_reductions) for length_reductions in baseline_reductions_map.values()]
+
+
+def test_words_dict_key_has_the_hub_dataset_revision(tmp_path, monkeypatch):
+    splinter_trainer = SplinterTrainer(HebrewUtils(), ArtifactsCache(str(tmp_path / 'cache')))
+    dataset_revisions = {'local': None, 'HeNLP/HeDC4': 'revision-a'}
+    monkeypatch.setattr('src.SplinterTrainer.get_hub_dataset_revision', lambda dataset_path, dataset_name: dataset_revisions[dataset_path])
+    local_key = splinter_trainer.get_words_dict_key('local', 'corpus')
+    hub_key = splinter_trainer.get_words_dict_key('HeNLP/HeDC4', None)
+
+    dataset_revisions['HeNLP/HeDC4'] = 'revision-b'
+    assert splinter_trainer.get_words_dict_key('HeNLP/HeDC4', None) != hub_key
+    assert splinter_trainer.get_words_dict_key('local', 'corpus') == local_key
+
+
+def test_unresolved_hub_dataset_revision_is_logged(monkeypatch, caplog):
+    def raise_connection_error(self, dataset_path):
+        raise ConnectionError('offline')
+
+    monkeypatch.setattr('huggingface_hub.HfApi.dataset_info', raise_connection_error)
+    get_hub_dataset_revision.cache_clear()
+    assert get_hub_dataset_revision('HeNLP/HeDC4', None) is None
+    get_hub_dataset_revision.cache_clear()
+    assert any(record.levelname == 'WARNING' and 'HeNLP/HeDC4' in record.message for record in caplog.records)
@@ -0,0 +1,54 @@
+import pytest
+
+from src.ArtifactsCache import ArtifactsCache
+from src.TextProcessorForDemo import TextProcessorForDemo
+
+DEMO_WORDS = {
+    'he': ['שלום', 'הילדים', 'ומלכים', 'לימון', 'כלבים', 'מה'],
+    'gez': ['ባሱማ', 'መሠረት', 'በሰመ', 'ሰላም', 'መጽሐፍ', 'ባሕር'],
+}
+
+
+def get_baseline_encoded_words(text_processor, words):
+    # the demo before the encoding table, which encoded the normalized word's reductions. The chars missing from the map,
+    # like the Ge'ez vowel markers, are kept as they are
+    encoded_words = list()
+    for word in words:
+        word = text_processor.language_utils.replace_final_letters(word)
+        word_reductions = text_processor.get_word_reductions(word)
+        encoded_words.append(''.join(text_processor.new_unicode_chars_map.get(reduction, reduction) for reduction in word_reductions))
+    return encoded_words
+
+
+@pytest.mark.parametrize('language', ['he', 'gez'])
+def test_demo_encodes_the_surface_words_once(tmp_path, request, language):
+    encoding_maps = request.getfixturevalue('hebrew_encoding_maps' if language == 'he' else 'geez_encoding_maps')
+    words = DEMO_WORDS[language]
+    text_processor = TextProcessorForDemo(*encoding_maps)
+    text_processor.load_encoding_table(ArtifactsCache(str(tmp_path / 'cache')))
+
+    _, encoded_text = text_processor.process(' '.join(words))
+
+    assert encoded_text.split(' ') == get_baseline_encoded_words(text_processor, words)
+    assert encoded_text != ' '.join(text_processor.language_utils.replace_final_letters(word) for word in words)
+    # the encoding table is keyed by the surface words, like the corpora runs
+    assert list(text_processor.new_encoded_words) == words
+
+
+@pytest.mark.parametrize('language', ['he', 'gez'])
+def test_demo_starts_warm_from_the_corpora_table(tmp_path, request, language):
+    encoding_maps = request.getfixturevalue('hebrew_encoding_maps' if language == 'he' else 'geez_encoding_maps')
+    words = DEMO_WORDS[language]
+    artifacts_cache = ArtifactsCache(str(tmp_path / 'cache'))
+    corpora_text_processor = TextProcessorForDemo(*encoding_maps)
+    corpora_text_processor.load_encoding_table(artifacts_cache)
+    expected_encoded_text = ' '.join(corpora_text_processor.get_encoded_word(word) for word in words)
+    corpora_text_processor.save_encoding_table(artifacts_cache)
+
+    text_processor = TextProcessorForDemo(*encoding_maps)
+    text_processor.load_encoding_table(artifacts_cache)
+    _, encoded_text = text_processor.process(' '.join(words))
+
+    assert encoded_text == expected_encoded_text
+    assert text_processor.encoding_table_hits == len(words)
+    assert len(text_processor.new_encoded_words) == 0
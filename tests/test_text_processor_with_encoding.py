@@ -0,0 +1,133 @@
+import pytest
+
+from src.TextProcessorWithEncoding import TextProcessorWithEncoding, ENCODING_MODES
+from src.benchmark_text_processor import ScanningTextProcessor
+from src.save_dataset_as_text_file import save_corpus_as_text_file, get_corpus_batches
+from src.utils.path_utils import get_corpus_path
+
+REAL_TEXTS = {
+    'he': 'בראשית ברא אלוהים את השמים ואת הארץ. והארץ הייתה תוהו ובוהו וחושך על פני תהום ורוח אלוהים מרחפת על פני המים.\n'
+          'ויאמר אלוהים יהי אור ויהי אור. וירא אלוהים את האור כי טוב ויבדל אלוהים בין האור ובין החושך.',
+    'gez': 'ኢትዮጵያ በአፍሪካ ቀንድ የምትገኝ ሀገር ናት። አዲስ አበባ የኢትዮጵያ ዋና ከተማ ናት።\n'
+           'መጽሐፍ ማንበብ ለአእምሮ ጠቃሚ ነው። ሰላም ለሁሉም ሰው ይሁን። በሰማይ ያሉ ከዋክብት ብዙ ናቸው።',
+}
+
+
+def get_text_processor(hebrew_encoding_maps, **kwargs):
+    return TextProcessorWithEncoding(*hebrew_encoding_maps, **kwargs)
+
+
+def get_distinct_words(text_processor, texts):
+    words = dict()
+    for text in texts:
+        words.update(dict.fromkeys(text_processor.get_words(text)))
+    return words
+
+
+def save_texts_as_local_corpus(texts, corpus_dir):
+    # a local corpus of one .txt file per text, in the order of the texts
+    corpus_dir.mkdir()
+    for index, text in enumerate(texts):
+        (corpus_dir / f'{index:03d}.txt').write_text(text, encoding='utf-8')
+    return str(corpus_dir)
+
+
+def read_saved_corpus(text_processor, corpus_dir, **kwargs):
+    save_corpus_as_text_file(text_processor, 'local', corpus_dir, batch_size=7, **kwargs)
+    with open(get_corpus_path('corpus'), 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+@pytest.mark.parametrize('encoding_mode', list(ENCODING_MODES))
+@pytest.mark.parametrize('language', ['he', 'gez'])
+def test_compiled_lookup_encodes_like_the_scanning_one(request, hebrew_texts, language, encoding_mode):
+    encoding_maps = request.getfixturevalue('hebrew_encoding_maps' if language == 'he' else 'geez_encoding_maps')
+    texts = [REAL_TEXTS[language]] + (hebrew_texts if language == 'he' else [])
+    scanning_text_processor = ScanningTextProcessor(*encoding_maps, encoding_mode=encoding_mode)
+    text_processor = TextProcessorWithEncoding(*encoding_maps, encoding_mode=encoding_mode)
+
+    expected_texts = [scanning_text_processor.process(text) for text in texts]
+    assert [text_processor.process(text) for text in texts] == expected_texts
+    # the words are reduced, not only copied
+    assert any(':' in encoding_maps[3].get(char, '') for char in expected_texts[0])
+
+
+def get_processed_corpus(text_processor, corpus_dir):
+    # the corpus file of the articles processed one by one, in the order they are read, each on its own lines
+    return ''.join(text_processor.process(text) + '\n' for dataset_batch in get_corpus_batches('local', corpus_dir, 7)
+                   for text in dataset_batch['text'])
+
+
+def test_pre_encoded_words_keep_process_output(hebrew_encoding_maps, hebrew_texts):
+    expected_texts = [get_text_processor(hebrew_encoding_maps).process(text) for text in hebrew_texts]
+
+    text_processor = get_text_processor(hebrew_encoding_maps, word_cache_size=10)
+    words = get_distinct_words(text_processor, hebrew_texts)
+    text_processor.pre_encode_words(words)
+
+    assert [text_processor.process(text) for text in hebrew_texts] == expected_texts
+    # every word is looked up in the pre-encoded table, and the words cache keeps its bound
+    assert len(text_processor.pre_encoded_words) == len(words)
+    assert text_processor.word_reductions_cache.max_size == 10
+    assert text_processor.word_reductions_cache.get_stats()['size'] == 0
+
+
+def test_pool_processes_the_batch_in_order(hebrew_encoding_maps, hebrew_texts):
+    expected_texts = [get_text_processor(hebrew_encoding_maps).process(text) for text in hebrew_texts]
+
+    assert get_text_processor(hebrew_encoding_maps).process_batch(hebrew_texts, n_workers=2) == expected_texts
+
+
+def test_pooled_corpus_is_the_articles_processed_one_by_one(tmp_path, hebrew_encoding_maps, hebrew_texts):
+    corpus_dir = save_texts_as_local_corpus(hebrew_texts, tmp_path / 'corpus')
+    expected_corpus = get_processed_corpus(get_text_processor(hebrew_encoding_maps), corpus_dir)
+
+    corpus = read_saved_corpus(get_text_processor(hebrew_encoding_maps), corpus_dir, n_workers=2)
+    assert corpus == expected_corpus
+    assert len(corpus.split('\n')) > len(hebrew_texts)
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_two_pass_corpus_is_the_articles_processed_one_by_one(tmp_path, hebrew_encoding_maps, hebrew_texts, n_workers):
+    corpus_dir = save_texts_as_local_corpus(hebrew_texts, tmp_path / 'corpus')
+    expected_corpus = get_processed_corpus(get_text_processor(hebrew_encoding_maps), corpus_dir)
+
+    text_processor = get_text_processor(hebrew_encoding_maps)
+    assert read_saved_corpus(text_processor, corpus_dir, two_pass=True, n_workers=n_workers) == expected_corpus
+    assert len(text_processor.pre_encoded_words) == len(get_distinct_words(text_processor, hebrew_texts))
+
+
+@pytest.mark.parametrize('queue_depth, n_workers', [(1, 1), (1, 2), (3, 2)])
+def test_pipeline_queue_depth_keeps_the_corpus(tmp_path, hebrew_encoding_maps, hebrew_texts, queue_depth, n_workers):
+    # with a queue of one batch the reader, the encoders and the writer wait for each other on every batch
+    corpus_dir = save_texts_as_local_corpus(hebrew_texts, tmp_path / 'corpus')
+    expected_corpus = get_processed_corpus(get_text_processor(hebrew_encoding_maps), corpus_dir)
+
+    corpus = read_saved_corpus(get_text_processor(hebrew_encoding_maps), corpus_dir, n_workers=n_workers, queue_depth=queue_depth)
+    assert corpus == expected_corpus
+
+
+def get_cache_lookups(text_processor, cache_name='words'):
+    cache_stats = text_processor.get_cache_stats()[cache_name]
+    return cache_stats['hits'] + cache_stats['misses']
+
+
+# user-015: the pool workers' cache counters are added up in the main processor
+def test_pool_cache_counters_are_added_up(hebrew_encoding_maps, hebrew_texts):
+    text_processor = get_text_processor(hebrew_encoding_maps)
+    for text in hebrew_texts:
+        text_processor.process(text)
+    expected_lookups = get_cache_lookups(text_processor)
+    assert expected_lookups > 0
+
+    # the counters of a processor that already counted are not counted again by its workers' copies
+    text_processor.process_batch(hebrew_texts, n_workers=2)
+    assert get_cache_lookups(text_processor) == 2 * expected_lookups
+    assert text_processor.get_cache_stats()['words']['size'] == len(text_processor.word_reductions_cache.entries)
+
+    pre_encoding_processor = get_text_processor(hebrew_encoding_maps)
+    words = get_distinct_words(pre_encoding_processor, hebrew_texts)
+    pre_encoding_processor.pre_encode_words(words, n_workers=2)
+    # the main processor encoded nothing itself, the reductions were all looked up by the workers
+    assert pre_encoding_processor.reductions_cache.get_stats()['hits'] + pre_encoding_processor.reductions_cache.get_stats()['misses'] == 0
+    assert get_cache_lookups(pre_encoding_processor, 'reductions') > 0